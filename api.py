@@ -0,0 +1,311 @@
+"""Headless JSON API over the job assistant engines.
+
+Run with:
+    python api.py --port 8080
+    LLM_BACKEND=stub python api.py      # offline, against stub_backend
+
+Engine calls are blocking, so they run on a bounded thread pool. At most
+API_MAX_CONCURRENCY operations run at once and at most API_MAX_QUEUE wait
+behind them; beyond that requests are rejected with 429. Each operation is
+cut off after API_REQUEST_TIMEOUT_SECONDS: single requests get 504 and
+batch items report the timeout in their own entry.
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from aiohttp import web
+from dotenv import load_dotenv
+
+# Before the modules below build their singletons from the environment
+load_dotenv()
+
+from job_search import JobSearchEngine
+from cover_letter import CoverLetterGenerator
+from resume_analyzer import ResumeAnalyzer
+from youtube_recommender import YouTubeRecommender
+from scheduler import scheduler, request_context, QuotaExceeded, SchedulerTimeout, INTERACTIVE, BATCH
+from model_router import router
+
+MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", 8))
+MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", 64))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("API_REQUEST_TIMEOUT_SECONDS", 120))
+MAX_BATCH_SIZE = int(os.getenv("API_MAX_BATCH_SIZE", 50))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WorkLimiter:
+    """Bounds concurrent engine calls and the number of calls allowed to wait for a slot."""
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="api-engine")
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    def reserve(self, count: int = 1) -> None:
+        """Admit `count` operations or raise QueueFull; call before doing any work for a request."""
+        if self.waiting + self.in_flight + count > self.max_concurrency + self.max_queue:
+            raise QueueFull()
+        self.waiting += count
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """Run a reserved blocking call on the engine pool, giving up on it after `timeout` seconds.
+
+        A call that timed out keeps its slot until the worker thread actually
+        finishes, so admission never counts a still-busy thread as free.
+        """
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+        # Carry the request's scheduler context (client and priority) onto the worker thread
+        call = functools.partial(contextvars.copy_context().run, fn, *args)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, call)
+        future.add_done_callback(self._release)
+        # Shielded, so a timeout or client disconnect does not mark the call done early
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _release(self, future: asyncio.Future) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # consumed, so abandoned calls don't log "exception never retrieved"
+
+
+async def _json_body(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Request body must be valid JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(reason="Request body must be a JSON object")
+    return body
+
+
+def _require(body: Dict[str, Any], *fields: str) -> None:
+    missing = [field for field in fields if not body.get(field)]
+    if missing:
+        raise web.HTTPBadRequest(reason=f"Missing required fields: {', '.join(missing)}")
+
+
+def _batch(body: Dict[str, Any], field: str) -> List[Any]:
+    items = body.get(field)
+    if not isinstance(items, list) or not items:
+        raise web.HTTPBadRequest(reason=f"'{field}' must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise web.HTTPRequestEntityTooLarge(max_size=MAX_BATCH_SIZE, actual_size=len(items))
+    return items
+
+
+def _admit(request: web.Request, count: int) -> "WorkLimiter":
+    """Reserve limiter capacity for `count` operations, or reject the request with 429."""
+    limiter: WorkLimiter = request.app['limiter']
+    try:
+        limiter.reserve(count)
+    except QueueFull:
+        raise web.HTTPTooManyRequests(
+            reason="Server is at capacity, retry later",
+            headers={'Retry-After': '5'}
+        )
+    return limiter
+
+
+def _client_id(request: web.Request) -> str:
+    return request.headers.get('X-Client-Id') or request.remote or "anonymous"
+
+
+async def _execute(request: web.Request, calls: List[Callable[[], Any]], priority: int = INTERACTIVE) -> List[Dict[str, Any]]:
+    """Run engine calls under the limiter, each with its own timeout; each call reports its own success or error."""
+    limiter = _admit(request, len(calls))
+    session_id = f"api:{_client_id(request)}"
+
+    async def run_one(call):
+        try:
+            with request_context(session_id=session_id, priority=priority):
+                return {'ok': True, 'result': await limiter.run(call, timeout=REQUEST_TIMEOUT_SECONDS)}
+        except asyncio.TimeoutError:
+            return {'ok': False, 'error': f"Timed out after {REQUEST_TIMEOUT_SECONDS}s"}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    return await asyncio.gather(*(run_one(call) for call in calls))
+
+
+async def _single(request: web.Request, call: Callable[[], Any]) -> web.Response:
+    limiter = _admit(request, 1)
+    try:
+        with request_context(session_id=f"api:{_client_id(request)}", priority=INTERACTIVE):
+            result = await limiter.run(call, timeout=REQUEST_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise web.HTTPGatewayTimeout(reason=f"Request exceeded {REQUEST_TIMEOUT_SECONDS}s")
+    except ValueError as e:
+        raise web.HTTPBadRequest(reason=str(e))
+    except QuotaExceeded as e:
+        raise web.HTTPTooManyRequests(reason=str(e))
+    except SchedulerTimeout as e:
+        raise web.HTTPServiceUnavailable(reason=str(e))
+    except Exception as e:
+        raise web.HTTPBadGateway(reason=str(e))
+    return web.json_response(result, dumps=_dumps)
+
+
+def _dumps(data: Any) -> str:
+    # VideoRecords and other dataclasses serialize as plain objects
+    return json.dumps(data, default=lambda value: {slot: getattr(value, slot) for slot in value.__slots__})
+
+
+async def search_jobs(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume')
+    if 'locations' in body:
+        locations = _batch(body, 'locations')
+    else:
+        _require(body, 'location')
+        locations = [body['location']]
+    engine = request.app['job_engine']
+    return await _single(request, lambda: engine.run_multi_location_search(body['resume'], locations))
+
+
+async def analyze_resume(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume')
+    analyzer = request.app['analyzer']
+    return await _single(request, lambda: analyzer.analyze_resume(body['resume']))
+
+
+async def resume_recommendations(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume')
+    analyzer = request.app['analyzer']
+    return await _single(request, lambda: analyzer.get_detailed_recommendations(body['resume'], body.get('target_role')))
+
+
+def _cover_letter_call(generator: CoverLetterGenerator, resume: str, job: Dict[str, Any]) -> Callable[[], Any]:
+    return lambda: generator.generate_cover_letter(
+        resume_content=resume,
+        job_title=job['job_title'],
+        company_name=job['company_name'],
+        hiring_manager=job.get('hiring_manager'),
+        job_description=job.get('job_description'),
+        two_stage=job.get('two_stage', False)
+    )
+
+
+async def cover_letter(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume', 'job_title', 'company_name')
+    return await _single(request, _cover_letter_call(request.app['cover_letters'], body['resume'], body))
+
+
+async def youtube_recommendations(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume')
+    recommender = request.app['youtube']
+    return await _single(request, lambda: recommender.get_recommendations(body['resume']))
+
+
+async def batch_analyze(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    resumes = _batch(body, 'resumes')
+    analyzer = request.app['analyzer']
+    results = await _execute(request, [lambda resume=resume: analyzer.analyze_resume(resume) for resume in resumes], BATCH)
+    return web.json_response({'results': results})
+
+
+async def batch_search_jobs(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'location')
+    resumes = _batch(body, 'resumes')
+    engine = request.app['job_engine']
+    results = await _execute(
+        request,
+        [lambda resume=resume: engine.run_job_search(resume, body['location']) for resume in resumes],
+        BATCH
+    )
+    return web.json_response({'results': results})
+
+
+async def batch_cover_letters(request: web.Request) -> web.Response:
+    body = await _json_body(request)
+    _require(body, 'resume')
+    jobs = _batch(body, 'jobs')
+    for job in jobs:
+        if not isinstance(job, dict):
+            raise web.HTTPBadRequest(reason="Each item of 'jobs' must be a JSON object")
+        _require(job, 'job_title', 'company_name')
+    generator = request.app['cover_letters']
+    results = await _execute(request, [_cover_letter_call(generator, body['resume'], job) for job in jobs], BATCH)
+    return web.json_response({'results': results})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.json_response(dict(scheduler.metrics(), routing=router.metrics()))
+
+
+async def health(request: web.Request) -> web.Response:
+    limiter: WorkLimiter = request.app['limiter']
+    return web.json_response({
+        'status': 'ok',
+        'in_flight': limiter.in_flight,
+        'waiting': limiter.waiting,
+        'max_concurrency': limiter.max_concurrency,
+        'max_queue': limiter.max_queue,
+    })
+
+
+def create_app(
+    job_engine: JobSearchEngine = None,
+    analyzer: ResumeAnalyzer = None,
+    cover_letters: CoverLetterGenerator = None,
+    youtube: YouTubeRecommender = None,
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_queue: int = MAX_QUEUE
+) -> web.Application:
+    """Build the API app; engines can be injected, e.g. built around stub_backend for local testing."""
+    app = web.Application()
+
+    async def on_startup(app):
+        # The semaphore must be created on the serving event loop
+        app['limiter'] = WorkLimiter(max_concurrency, max_queue)
+
+    async def on_cleanup(app):
+        app['limiter'].executor.shutdown(wait=False, cancel_futures=True)
+
+    app['job_engine'] = job_engine or JobSearchEngine()
+    app['analyzer'] = analyzer or ResumeAnalyzer()
+    app['cover_letters'] = cover_letters or CoverLetterGenerator()
+    app['youtube'] = youtube or YouTubeRecommender()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_post('/jobs/search', search_jobs)
+    app.router.add_post('/resume/analyze', analyze_resume)
+    app.router.add_post('/resume/recommendations', resume_recommendations)
+    app.router.add_post('/cover-letters', cover_letter)
+    app.router.add_post('/youtube/recommendations', youtube_recommendations)
+    app.router.add_post('/batch/jobs/search', batch_search_jobs)
+    app.router.add_post('/batch/resume/analyze', batch_analyze)
+    app.router.add_post('/batch/cover-letters', batch_cover_letters)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI Job Assistant HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
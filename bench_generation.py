@@ -0,0 +1,58 @@
+"""Single-stage vs two-stage cover letter generation on one resume.
+
+Generates the same letter both ways with CoverLetterGenerator and reports
+per-letter latency, the resume context sent with each letter, and the
+structural checks used as a quality-parity signal. `--stub` runs against the
+fake providers, so no API keys are needed.
+
+    python bench_generation.py --stub
+    python bench_generation.py --job-title "Data Engineer" --company "Example Corp"
+"""
+import argparse
+import os
+
+RESUME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_resume.txt")
+
+
+def print_comparison(result):
+    for mode in ("single_stage", "two_stage"):
+        stats = result[mode]
+        passed = sum(stats['checks'].values())
+        print(
+            f"  {mode:<13} {stats['latency_seconds']:.2f}s  "
+            f"context {stats['context_chars']} chars  checks {passed}/{len(stats['checks'])}"
+        )
+        failed = [check for check, ok in stats['checks'].items() if not ok]
+        if failed:
+            print(f"  {'':<13} failed: {', '.join(failed)}")
+    print(f"  context reduction {result['context_reduction']:.0%}, quality parity: {'yes' if result['parity'] else 'no'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resume", default=RESUME_PATH, help="plain-text resume to generate from")
+    parser.add_argument("--job-title", default="Software Engineer")
+    parser.add_argument("--company", default="Example Corp")
+    parser.add_argument("--job-description", default=None)
+    parser.add_argument("--stub", action="store_true", help="use the stub backends instead of the real providers")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub provider latency in seconds")
+    args = parser.parse_args()
+
+    if args.stub:
+        # Must be set before any engine or scheduler module is imported
+        os.environ["LLM_BACKEND"] = "stub"
+        os.environ["STUB_LATENCY_SECONDS"] = str(args.latency)
+
+    from cover_letter import CoverLetterGenerator
+
+    with open(args.resume, "r", encoding="utf-8") as f:
+        resume_content = f.read()
+
+    result = CoverLetterGenerator().compare_generation_modes(
+        resume_content=resume_content,
+        job_title=args.job_title,
+        company_name=args.company,
+        job_description=args.job_description
+    )
+    print(f"Cover letter generation modes ({args.job_title} at {args.company})")
+    print_comparison(result)
@@ -0,0 +1,87 @@
+"""Cold-start benchmark for the Streamlit app.
+
+Each run starts a fresh interpreter, renders main.py once with Streamlit's
+AppTest and reports the time to first render. `--eager` pre-imports every
+engine module and LangChain provider first, reproducing the old
+top-of-file imports, so the two modes can be compared. `--importtime` adds
+a `-X importtime` breakdown of the slowest top-level imports.
+
+    python bench_startup.py --runs 5
+    python bench_startup.py --runs 5 --eager --importtime
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+ENGINE_MODULES = ["job_search", "cover_letter", "resume_analyzer", "youtube_recommender"]
+# What the engine modules used to import at the top
+PROVIDER_MODULES = ["langchain_google_genai", "langchain_community.utilities", "langchain_community.tools"]
+
+RENDER_SCRIPT = """
+import time
+start = time.perf_counter()
+{preload}
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("main.py", default_timeout=60)
+app.run()
+print(time.perf_counter() - start)
+"""
+
+
+def _script(eager):
+    preload = ""
+    if eager:
+        preload = "import importlib\n" + "".join(
+            f"try:\n    importlib.import_module({module!r})\nexcept ImportError:\n    pass\n"
+            for module in ENGINE_MODULES + PROVIDER_MODULES
+        )
+    return RENDER_SCRIPT.format(preload=preload)
+
+
+def time_first_render(eager, runs):
+    """Seconds from interpreter start to first rendered page, one fresh process per run."""
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _script(eager)],
+            capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def importtime_breakdown(eager, top):
+    """Top-level imports ranked by cumulative import time, in milliseconds."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _script(eager)],
+        capture_output=True, text=True, check=True
+    )
+    totals = {}
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part for part in line[len("import time:"):].split("|"))
+        # Unindented names are imported directly rather than as a dependency of another import
+        if not name.startswith("  "):
+            totals[name.strip()] = int(cumulative) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="pre-import all engine modules (old behaviour)")
+    parser.add_argument("--importtime", action="store_true", help="print a -X importtime breakdown")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    mode = "eager" if args.eager else "lazy"
+    timings = time_first_render(args.eager, args.runs)
+    print(f"Cold start to first render ({mode}, {args.runs} runs)")
+    print(f"  median {statistics.median(timings):.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s")
+
+    if args.importtime:
+        print(f"\nSlowest top-level imports ({mode})")
+        for name, ms in importtime_breakdown(args.eager, args.top):
+            print(f"  {ms:9.1f} ms  {name}")
@@ -1,13 +1,29 @@
+import contextvars
+import hashlib
+import io
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Optional, List, Dict, Any, Callable
+from model_router import RoutedLLM
+from scheduler import request_context, BATCH, SchedulerError
 
-load_dotenv()
+# Candidate narratives keyed by resume hash, shared by every generator instance.
+_NARRATIVE_CACHE_SIZE = 64
+_narrative_cache: "OrderedDict[str, str]" = OrderedDict()
+_narrative_lock = threading.Lock()
+
+def resume_hash(resume_content: str) -> str:
+    """Stable identifier for a resume version."""
+    return hashlib.sha256(resume_content.encode("utf-8")).hexdigest()
 
 class CoverLetterGenerator:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.7)
+    def __init__(self, llm=None):
+        self.llm = llm or RoutedLLM(temperature=0.7)
     
     def generate_cover_letter(
         self, 
@@ -15,9 +31,14 @@ class CoverLetterGenerator:
         job_title: str, 
         company_name: str,
         hiring_manager: Optional[str] = None,
-        job_description: Optional[str] = None
+        job_description: Optional[str] = None,
+        two_stage: bool = False
     ) -> str:
-        """Generate a personalized cover letter based on resume and job details."""
+        """Generate a personalized cover letter based on resume and job details.
+        
+        With `two_stage`, the prompt carries the cached candidate narrative
+        instead of the full resume, which keeps per-job prompts small.
+        """
         
         # Prepare the greeting
         if hiring_manager:
@@ -38,6 +59,30 @@ class CoverLetterGenerator:
         # Current date
         current_date = datetime.now().strftime("%B %d, %Y")
         
+        if two_stage:
+            narrative = self.get_candidate_narrative(resume_content)
+            cover_letter_prompt = f"""
+        Write a compelling, personalized 3-4 paragraph cover letter (250-400 words) in a professional yet engaging tone.
+        Open strongly, connect 2-3 of the candidate's most relevant achievements to this role, show genuine interest in the company and end with a confident call to action.
+
+        Candidate Narrative:
+        ---
+        {narrative}
+        ---
+
+        {job_desc_context}
+
+        Job Details:
+        - Position: {job_title}
+        - Company: {company_name}
+        - Date: {current_date}
+        - Greeting: {greeting}
+
+        Format: date at the top, the greeting, body paragraphs, then "Sincerely," followed by the candidate's name and contact block from the narrative.
+        """
+            response = self.llm.invoke(cover_letter_prompt, task='cover_letter')
+            return response.content.strip()
+        
         cover_letter_prompt = f"""
         You are an expert career counselor and professional writer. Create a compelling, personalized cover letter that will make the candidate stand out.
 
@@ -73,9 +118,84 @@ class CoverLetterGenerator:
         Write a cover letter that tells a story and makes a connection between the candidate's background and this specific opportunity.
         """
         
-        response = self.llm.invoke(cover_letter_prompt)
+        response = self.llm.invoke(cover_letter_prompt, task='cover_letter')
         return response.content.strip()
     
+    def get_candidate_narrative(self, resume_content: str) -> str:
+        """Return the compact candidate narrative for a resume, distilling it once per resume version."""
+        key = resume_hash(resume_content)
+        
+        with _narrative_lock:
+            if key in _narrative_cache:
+                _narrative_cache.move_to_end(key)
+                return _narrative_cache[key]
+        
+        narrative_prompt = f"""
+        Distill the following resume into a compact candidate narrative that a writer can use to draft cover letters for many different jobs.
+
+        Return plain text with exactly these sections and nothing else:
+        Name and Contact: <full name, email, phone, location, links as found in the resume>
+        Summary: <2 sentences on who the candidate is and their level of experience>
+        Key Achievements: <4-6 bullet points, each with concrete numbers or outcomes where available>
+        Themes: <3-5 short phrases describing strengths and the kind of work they do best>
+        Core Skills: <comma-separated list of the most important skills and technologies>
+
+        Keep it under 250 words. Do not invent anything that is not in the resume.
+
+        Resume:
+        ---
+        {resume_content}
+        ---
+        """
+        
+        response = self.llm.invoke(narrative_prompt, task='candidate_narrative')
+        narrative = response.content.strip()
+        
+        with _narrative_lock:
+            _narrative_cache[key] = narrative
+            _narrative_cache.move_to_end(key)
+            while len(_narrative_cache) > _NARRATIVE_CACHE_SIZE:
+                _narrative_cache.popitem(last=False)
+        
+        return narrative
+    
+    def compare_generation_modes(
+        self,
+        resume_content: str,
+        job_title: str,
+        company_name: str,
+        hiring_manager: Optional[str] = None,
+        job_description: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Generate the same letter single-stage and two-stage and report cost and quality-parity signals."""
+        modes = {}
+        
+        for mode, two_stage in (("single_stage", False), ("two_stage", True)):
+            if two_stage:
+                # Build the narrative first so its one-off cost is not counted as per-letter latency
+                self.get_candidate_narrative(resume_content)
+            
+            start = time.perf_counter()
+            letter = self.generate_cover_letter(
+                resume_content=resume_content,
+                job_title=job_title,
+                company_name=company_name,
+                hiring_manager=hiring_manager,
+                job_description=job_description,
+                two_stage=two_stage
+            )
+            modes[mode] = {
+                'content': letter,
+                'latency_seconds': round(time.perf_counter() - start, 2),
+                'context_chars': len(self.get_candidate_narrative(resume_content)) if two_stage else len(resume_content),
+                'checks': _letter_quality_checks(letter, job_title, company_name)
+            }
+        
+        single, two = modes['single_stage'], modes['two_stage']
+        modes['parity'] = all(two['checks'][check] or not single['checks'][check] for check in single['checks'])
+        modes['context_reduction'] = round(1 - two['context_chars'] / max(single['context_chars'], 1), 2)
+        return modes
+    
     def generate_multiple_versions(
         self, 
         resume_content: str, 
@@ -136,11 +256,128 @@ class CoverLetterGenerator:
             Create a complete, professional cover letter.
             """
             
-            response = self.llm.invoke(version_prompt)
+            response = self.llm.invoke(version_prompt, task='cover_letter_variant')
             versions.append({
                 'version': i + 1,
                 'tone': tone,
                 'content': response.content.strip()
             })
         
-        return versions
\ No newline at end of file
+        return versions
+    
+    def generate_bulk(
+        self,
+        resume_content: str,
+        jobs: List[Dict[str, Any]],
+        max_workers: int = 4,
+        max_retries: int = 2,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+        two_stage: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Generate cover letters for many jobs across a bounded worker pool.
+        
+        Returns one result per job, in the order of `jobs`. `on_result` is called
+        on the calling thread as each job finishes, so it may update UI state.
+        Calls are scheduled in the batch priority class, behind interactive work.
+        """
+        with request_context(priority=BATCH):
+            return self._generate_bulk(resume_content, jobs, max_workers, max_retries, on_result, two_stage)
+    
+    def _generate_bulk(self, resume_content, jobs, max_workers, max_retries, on_result, two_stage):
+        results: List[Dict[str, Any]] = [None] * len(jobs)
+        
+        if two_stage and jobs:
+            # Distill the narrative once up front instead of racing every worker to it
+            try:
+                self.get_candidate_narrative(resume_content)
+            except Exception as e:
+                print(f"Warning: Could not build candidate narrative, using full resume. Error: {e}")
+                two_stage = False
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                # Each worker runs in a copy of this context so the scheduler sees the session and priority
+                executor.submit(contextvars.copy_context().run, self._generate_for_job, resume_content, job, max_retries, two_stage): i
+                for i, job in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if on_result:
+                    on_result(index, results[index])
+        
+        return results
+    
+    def _generate_for_job(
+        self,
+        resume_content: str,
+        job: Dict[str, Any],
+        max_retries: int,
+        two_stage: bool = False
+    ) -> Dict[str, Any]:
+        """Generate one letter of a bulk run, retrying this job alone on failure."""
+        error = None
+        
+        for attempt in range(1, max_retries + 2):
+            try:
+                content = self.generate_cover_letter(
+                    resume_content=resume_content,
+                    job_title=job.get('title', ''),
+                    company_name=job.get('company', ''),
+                    # Only a real posting description; 'relevance_reason' is the model's own fit summary
+                    job_description=job.get('description') or None,
+                    two_stage=two_stage
+                )
+                return {'job': job, 'status': 'ok', 'content': content, 'error': None, 'attempts': attempt}
+            except SchedulerError as e:
+                # Quota and scheduler timeouts won't clear within the batch, so don't sleep on them
+                print(f"Warning: Cover letter for '{job.get('title')}' failed (attempt {attempt}). Error: {e}")
+                return {'job': job, 'status': 'failed', 'content': None, 'error': str(e), 'attempts': attempt}
+            except Exception as e:
+                error = str(e)
+                print(f"Warning: Cover letter for '{job.get('title')}' failed (attempt {attempt}). Error: {e}")
+                if attempt <= max_retries:
+                    time.sleep(min(2 ** attempt, 10))
+        
+        return {'job': job, 'status': 'failed', 'content': None, 'error': error, 'attempts': max_retries + 1}
+
+
+def _letter_quality_checks(letter: str, job_title: str, company_name: str) -> Dict[str, bool]:
+    """Cheap structural checks used to compare generation modes."""
+    word_count = len(letter.split())
+    lowered = letter.lower()
+    return {
+        'length_in_range': 200 <= word_count <= 450,
+        'mentions_company': company_name.lower() in lowered,
+        'mentions_role': job_title.lower() in lowered,
+        'has_greeting': 'dear ' in lowered,
+        'has_closing': 'sincerely' in lowered,
+        'no_placeholders': not re.search(r'\[(your |candidate )?name[^\]]*\]', lowered),
+    }
+
+
+def cover_letter_filename(job: Dict[str, Any]) -> str:
+    """Build a filesystem-safe file name for a job's cover letter."""
+    stem = f"cover_letter_{job.get('company', 'company')}_{job.get('title', 'job')}"
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', stem).strip('_') + ".txt"
+
+
+def package_cover_letters(results: List[Dict[str, Any]]) -> bytes:
+    """Package the successful letters of a bulk run into a single zip archive."""
+    buffer = io.BytesIO()
+    used_names = set()
+    
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            if not result or result.get('status') != 'ok':
+                continue
+            
+            name = cover_letter_filename(result['job'])
+            suffix = 2
+            while name in used_names:
+                name = cover_letter_filename(result['job'])[:-4] + f"_{suffix}.txt"
+                suffix += 1
+            used_names.add(name)
+            archive.writestr(name, result['content'])
+    
+    return buffer.getvalue()
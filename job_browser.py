@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional
+
+SORT_OPTIONS = {
+    "Relevance": None,  # order returned by the search, best match first
+    "Company": "company",
+    "Location": "location",
+    "Title": "title",
+}
+
+
+def facet_values(jobs: List[Dict[str, Any]], field: str) -> List[str]:
+    """Distinct values of a field, for filter widgets; list fields contribute each of their items."""
+    values = set()
+    for job in jobs:
+        value = job.get(field)
+        if isinstance(value, list):
+            values.update(str(item) for item in value)
+        else:
+            values.add(str(value or "N/A"))
+    return sorted(values, key=str.lower)
+
+
+def query_jobs(
+    jobs: List[Dict[str, Any]],
+    companies: Optional[List[str]] = None,
+    locations: Optional[List[str]] = None,
+    text: str = "",
+    sort_by: str = "Relevance",
+    page: int = 1,
+    page_size: int = 10,
+    searched_locations: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Filter, sort and slice job results so only one page is ever rendered.
+
+    Items are (index, job) pairs where index is the job's position in the
+    full result list, which keeps widget keys stable across pages.
+    """
+    companies = set(companies or [])
+    locations = set(locations or [])
+    searched_locations = set(searched_locations or [])
+    needle = text.strip().lower()
+
+    matches = [
+        (i, job) for i, job in enumerate(jobs)
+        if (not companies or str(job.get('company') or "N/A") in companies)
+        and (not locations or str(job.get('location') or "N/A") in locations)
+        and (not searched_locations or searched_locations & set(job.get('matched_locations') or []))
+        and (not needle or needle in f"{job.get('title', '')} {job.get('relevance_reason', '')}".lower())
+    ]
+
+    sort_field = SORT_OPTIONS.get(sort_by)
+    if sort_field:
+        matches.sort(key=lambda item: str(item[1].get(sort_field) or "").lower())
+
+    page_count = max(1, -(-len(matches) // page_size))
+    page = min(max(1, page), page_count)
+    start = (page - 1) * page_size
+
+    return {
+        'items': matches[start:start + page_size],
+        'total': len(matches),
+        'page': page,
+        'page_count': page_count,
+    }
@@ -1,16 +1,31 @@
-import time
+import contextvars
 import json
-from typing import List, Dict, Any
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.utilities import GoogleSerperAPIWrapper
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set
+from llm_backend import get_search_tool
+from model_router import RoutedLLM
+
+
+def _link_key(link: str) -> str:
+    """Normalized posting URL, so the same posting found from two queries is merged."""
+    link = link.strip().lower().split("#")[0]
+    for prefix in ("https://", "http://", "www."):
+        if link.startswith(prefix):
+            link = link[len(prefix):]
+    return link.rstrip("/")
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    if result.get("link"):
+        return _link_key(result["link"])
+    return f"{result.get('title', '')}|{result.get('snippet', '')}".lower()
 
-load_dotenv()
 
 class JobSearchEngine:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.5)
-        self.search_tool = GoogleSerperAPIWrapper()
+    def __init__(self, llm=None, search_tool=None, max_workers=4):
+        self.llm = llm or RoutedLLM(temperature=0.5)
+        self.search_tool = search_tool or get_search_tool()
+        self.max_workers = max_workers
     
     def extract_job_profiles(self, resume_content: str) -> List[str]:
         """Extract relevant job titles from resume content."""
@@ -25,7 +40,7 @@ class JobSearchEngine:
         ---
         """
         
-        profile_response = self.llm.invoke(profile_prompt)
+        profile_response = self.llm.invoke(profile_prompt, task='job_profiles')
         job_profiles = [line.strip() for line in profile_response.content.strip().split("\n") if line.strip()]
         
         if not job_profiles:
@@ -35,22 +50,42 @@ class JobSearchEngine:
     
     def search_jobs_online(self, job_profiles: List[str], location: str) -> List[Dict[str, Any]]:
         """Search for jobs online based on job profiles and location."""
-        all_raw_results = []
-        queries = [f'"{profile}" jobs in {location}' for profile in job_profiles]
+        return self.search_job_matrix(job_profiles, [location])
+    
+    def search_job_matrix(self, job_profiles: List[str], locations: List[str]) -> List[Dict[str, Any]]:
+        """Run every profile x location query concurrently and merge postings found in several locations.
         
-        for query in queries:
-            try:
-                results_list = self.search_tool.results(query, num_results=5)
-                all_raw_results.extend(results_list.get("organic", []))
-                time.sleep(1)  # Rate limiting
-                
-            except Exception as e:
-                print(f"Warning: Could not execute query '{query}'. Error: {e}")
-                continue
+        Each merged result lists the locations whose queries found it under 'search_locations'.
+        """
+        queries = [(f'"{profile}" jobs in {location}', location) for location in locations for profile in job_profiles]
+        if not queries:
+            return []
+        
+        # Queries share the scheduler's Serper rate limit; each worker keeps the caller's session and priority
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self._search_query, query) for query, _ in queries]
+            pages = [future.result() for future in futures]
+        
+        merged: Dict[str, Dict[str, Any]] = {}
+        for (_, location), organic in zip(queries, pages):
+            for result in organic:
+                key = _result_key(result)
+                if key not in merged:
+                    merged[key] = {field: value for field, value in result.items() if field != "position"}
+                    merged[key]['search_locations'] = []
+                if location not in merged[key]['search_locations']:
+                    merged[key]['search_locations'].append(location)
         
-        return all_raw_results
+        return list(merged.values())
+    
+    def _search_query(self, query: str) -> List[Dict[str, Any]]:
+        try:
+            return self.search_tool.results(query, num_results=5).get("organic", [])
+        except Exception as e:
+            print(f"Warning: Could not execute query '{query}'. Error: {e}")
+            return []
     
-    def structure_results(self, raw_results: List[Dict], resume_content: str) -> List[Dict[str, Any]]:
+    def structure_results(self, raw_results: List[Dict], resume_content: str, max_jobs: int = 10) -> List[Dict[str, Any]]:
         """Structure raw search results into formatted job postings."""
         if not raw_results:
             return []
@@ -58,7 +93,7 @@ class JobSearchEngine:
         structure_prompt = f"""
         You are an expert hiring assistant. Analyze the provided list of raw Google search results and a user's resume to identify valid job postings.
 
-        From the results, extract up to 10 relevant job postings. Return your findings as a JSON object with a single key "jobs" which contains a list of objects. Each object should have the following keys: "title", "company", "location", "link", "relevance_reason".
+        From the results, extract up to {max_jobs} relevant job postings. Return your findings as a JSON object with a single key "jobs" which contains a list of objects. Each object should have the following keys: "title", "company", "location", "link", "relevance_reason".
 
         Only include results that are clearly job postings (not career advice articles, resume tips, etc.).
         Make the relevance_reason specific and personalized based on the resume.
@@ -74,7 +109,7 @@ class JobSearchEngine:
         ---
         """
         
-        structured_response = self.llm.invoke(structure_prompt)
+        structured_response = self.llm.invoke(structure_prompt, task='job_structuring')
         
         try:
             cleaned_response = structured_response.content.strip().replace("```json", "").replace("```", "")
@@ -84,25 +119,68 @@ class JobSearchEngine:
             print("Error: Failed to decode the structured response from the AI.")
             return []
     
-    def run_job_search(self, resume_content: str, location: str) -> List[Dict[str, Any]]:
+    def run_job_search(self, resume_content: str, location: str, job_profiles: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Main method to run the complete job search process."""
+        return self.run_multi_location_search(resume_content, [location], job_profiles)
+    
+    def run_multi_location_search(
+        self,
+        resume_content: str,
+        locations: List[str],
+        job_profiles: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search several locations with one profile extraction and one structuring pass.
+        
+        LLM calls stay the same however many locations are searched; only the
+        web queries grow. Each job lists every searched location it matches
+        under 'matched_locations'.
+        """
+        unique = {}
+        for location in locations:
+            unique.setdefault(location.strip().lower(), location.strip())
+        locations = [location for location in unique.values() if location]
+        if not locations:
+            raise ValueError("At least one location is required.")
+        
         try:
-            # Step 1: Extract job profiles
-            job_profiles = self.extract_job_profiles(resume_content)
+            # Step 1: Extract job profiles once, unless they were precomputed
+            job_profiles = job_profiles or self.extract_job_profiles(resume_content)
             print(f"Found profiles: {', '.join(job_profiles)}")
             
-            # Step 2: Search for jobs online
-            raw_results = self.search_jobs_online(job_profiles, location)
+            # Step 2: Search every profile in every location, merging duplicates
+            raw_results = self.search_job_matrix(job_profiles, locations)
             
             if not raw_results:
                 print("No search results found.")
                 return []
             
-            # Step 3: Structure results
-            structured_jobs = self.structure_results(raw_results, resume_content)
+            # Step 3: Structure the combined results in a single pass
+            max_jobs = min(10 + 5 * (len(locations) - 1), 25)
+            structured_jobs = self.structure_results(raw_results, resume_content, max_jobs=max_jobs)
             
-            return structured_jobs
+            # Step 4: Tag each job with the searched locations it matches
+            return _tag_locations(structured_jobs, raw_results, locations)
             
         except Exception as e:
             print(f"Error in job search: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+
+def _tag_locations(jobs: List[Dict[str, Any]], raw_results: List[Dict[str, Any]], locations: List[str]) -> List[Dict[str, Any]]:
+    """Matched locations come from the queries that found the posting, plus any named in its location.
+    
+    A searched location is named in a posting when each of its comma-separated
+    parts is a whole part of the posting's location, so "Austin" matches
+    "Austin, TX" but "LA" does not match "Dallas, TX".
+    """
+    found_in = {_link_key(result['link']): result['search_locations'] for result in raw_results if result.get('link')}
+    for job in jobs:
+        matched = set(found_in.get(_link_key(str(job.get('link') or '')), []))
+        posted = _location_parts(str(job.get('location') or ''))
+        matched.update(location for location in locations if _location_parts(location) <= posted)
+        job['matched_locations'] = [location for location in locations if location in matched]
+    return jobs
+
+
+def _location_parts(location: str) -> Set[str]:
+    return {part.strip().lower() for part in location.split(",") if part.strip()}
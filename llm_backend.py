@@ -0,0 +1,41 @@
+import os
+from dotenv import load_dotenv
+from scheduler import ScheduledClient
+
+load_dotenv()
+
+
+def use_stub_backend() -> bool:
+    """True when LLM_BACKEND=stub, which swaps every provider for the offline stubs."""
+    return os.getenv("LLM_BACKEND", "gemini").lower() == "stub"
+
+
+def create_llm(model: str, temperature: float, **kwargs):
+    """Bare chat model client; model_router puts it behind the scheduler."""
+    if use_stub_backend():
+        from stub_backend import StubLLM
+        return StubLLM(model=model, temperature=temperature, **kwargs)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, **kwargs)
+
+
+def get_search_tool():
+    """Web search client used for job postings."""
+    if use_stub_backend():
+        from stub_backend import StubSearch
+        search = StubSearch()
+    else:
+        from langchain_community.utilities import GoogleSerperAPIWrapper
+        search = GoogleSerperAPIWrapper()
+    return ScheduledClient(search, "serper", ("results",))
+
+
+def get_youtube_tool():
+    """YouTube search client used for course recommendations."""
+    if use_stub_backend():
+        from stub_backend import StubYouTubeTool
+        tool = StubYouTubeTool()
+    else:
+        from langchain_community.tools import YouTubeSearchTool
+        tool = YouTubeSearchTool()
+    return ScheduledClient(tool, "youtube", ("run",))
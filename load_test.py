@@ -0,0 +1,253 @@
+"""Load test: many simulated Streamlit sessions against the stub backends.
+
+Each simulated session is a Streamlit AppTest instance driving main.py
+through upload, job search, analysis, cover letter and YouTube pages. The
+run forces LLM_BACKEND=stub, so no API keys are needed, and
+STUB_LATENCY_SECONDS sets the per-call latency of the fake providers.
+
+The harness sweeps increasing concurrency levels and reports, for each
+level, throughput, per-page latency percentiles, and CPU and memory per
+session. It stops at the level where the instance saturates, meaning
+throughput stops growing or p95 latency blows up.
+
+AppTest swaps process-wide globals on every run, so script runs are
+serialized under a lock. The provider calls and background tasks that the
+scripts start still run concurrently. Script execution is mostly
+GIL-bound anyway, so this stays close to a real server.
+
+    python load_test.py --levels 1 2 4 8 16 --flows 2 --latency 0.5
+"""
+import argparse
+import os
+import resource
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+RESUME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_resume.txt")
+PAGES = ["upload", "job_search", "analysis", "cover_letter", "youtube"]
+
+_script_run_lock = threading.Lock()
+
+
+def _rss_bytes() -> int:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class SimulatedSession:
+    def __init__(self, resume: bytes, timeout: float, poll_interval: float):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file("main.py", default_timeout=timeout)
+        self.resume = resume
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def _rerun(self) -> None:
+        with _script_run_lock:
+            self.app.run()
+        if self.app.exception:
+            raise RuntimeError(f"Script raised: {self.app.exception[0].message}")
+
+    def _click(self, label: str) -> None:
+        next(button for button in self.app.button if button.label == label).click()
+        self._rerun()
+
+    def _goto(self, page: str) -> None:
+        self.app.sidebar.radio[0].set_value(page)
+        self._rerun()
+
+    def _wait_for(self, ready: Callable[[], bool]) -> None:
+        """Rerun the script, like the polling fragment does, until background work lands."""
+        deadline = time.monotonic() + self.timeout
+        while not ready():
+            if time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for page results")
+            time.sleep(self.poll_interval)
+            self._rerun()
+
+    def _results(self) -> Dict[str, Any]:
+        from session_store import session_store
+        state = self.app.session_state
+        return session_store.items(state["session_id"], f"results/{state['resume_digest']}/")
+
+    def _clear_result(self, name: str) -> None:
+        from session_store import session_store
+        state = self.app.session_state
+        session_store.delete(state["session_id"], f"results/{state['resume_digest']}/{name}")
+
+    def upload(self) -> None:
+        self._rerun()
+        self.app.sidebar.file_uploader[0].set_value(("resume.txt", self.resume, "text/plain"))
+        self._rerun()
+        if not self.app.session_state["resume_digest"]:
+            raise RuntimeError("Resume upload was not processed")
+
+    def job_search(self) -> None:
+        self._goto("Job Search")
+        from session_store import session_store
+        session_id = self.app.session_state["session_id"]
+        session_store.delete(session_id, "job_results")
+        self._click("🔍 Search Jobs")
+        self._wait_for(lambda: bool(session_store.get(session_id, "job_results")))
+
+    def analysis(self) -> None:
+        self._goto("Resume Analyzer")
+        self._clear_result('analysis')
+        self._click("🤖 Analyze with AI")
+        self._wait_for(lambda: 'analysis' in self._results())
+
+    def cover_letter(self) -> None:
+        self._goto("Cover Letter Generator")
+        self._clear_result('cover_letter')
+        inputs = {text_input.label: text_input for text_input in self.app.text_input}
+        inputs["Job Title"].set_value("Software Engineer")
+        inputs["Company Name"].set_value("Example Corp")
+        self._click("📝 Generate Cover Letter")
+        self._wait_for(lambda: 'cover_letter' in self._results())
+
+    def youtube(self) -> None:
+        self._goto("YouTube Courses")
+        self._clear_result('youtube')
+        self._click("🔍 Get Course Recommendations")
+        self._wait_for(lambda: 'youtube' in self._results())
+        self._wait_for(lambda: any(md.value == "### 📚 Recommended Courses" for md in self.app.markdown))
+
+
+def run_level(concurrency: int, flows: int, resume: bytes, timeout: float, poll_interval: float) -> Dict[str, Any]:
+    """Run `flows` full page flows in each of `concurrency` sessions at once."""
+    latencies: Dict[str, List[float]] = {page: [] for page in PAGES}
+    errors: List[str] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency)
+
+    def session_worker():
+        session = SimulatedSession(resume, timeout, poll_interval)
+        start_barrier.wait()
+        for _ in range(flows):
+            for page in PAGES:
+                started = time.perf_counter()
+                try:
+                    getattr(session, page)()
+                except Exception as e:
+                    with lock:
+                        errors.append(f"{page}: {type(e).__name__}: {e}")
+                    continue
+                with lock:
+                    latencies[page].append(time.perf_counter() - started)
+
+    rss_before = _rss_bytes()
+    cpu_before = _cpu_seconds()
+    wall_start = time.perf_counter()
+
+    threads = [threading.Thread(target=session_worker, name=f"session-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall = time.perf_counter() - wall_start
+    completed = min(len(values) for values in latencies.values())
+    return {
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'flows_completed': completed,
+        'throughput_flows_per_second': completed / wall if wall else 0.0,
+        'latency': {
+            page: {
+                'p50': statistics.median(values) if values else 0.0,
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99),
+            }
+            for page, values in latencies.items()
+        },
+        'cpu_seconds_per_session': (_cpu_seconds() - cpu_before) / concurrency,
+        'memory_mb_per_session': max(0, _rss_bytes() - rss_before) / concurrency / 1e6,
+        'errors': errors,
+    }
+
+
+def find_saturation(results: List[Dict[str, Any]], min_gain: float = 0.1, latency_factor: float = 3.0):
+    """First concurrency level where throughput gains stall or p95 latency exceeds `latency_factor` x the baseline."""
+    if not results:
+        return None
+    baseline_p95 = max(stats['p95'] for stats in results[0]['latency'].values())
+    for previous, current in zip(results, results[1:]):
+        worst_p95 = max(stats['p95'] for stats in current['latency'].values())
+        gain = current['throughput_flows_per_second'] / max(previous['throughput_flows_per_second'], 1e-9) - 1
+        if gain < min_gain or worst_p95 > baseline_p95 * latency_factor:
+            return current['concurrency']
+    return None
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print(f"\n== {result['concurrency']} concurrent sessions ==")
+    print(
+        f"  {result['flows_completed']} flows in {result['wall_seconds']:.1f}s "
+        f"({result['throughput_flows_per_second']:.2f} flows/s)"
+    )
+    print(
+        f"  CPU {result['cpu_seconds_per_session']:.2f}s/session, "
+        f"memory +{result['memory_mb_per_session']:.1f} MB/session"
+    )
+    for page, stats in result['latency'].items():
+        print(f"  {page:<13} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s")
+    if result['errors']:
+        print(f"  {len(result['errors'])} errors, first: {result['errors'][0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test main.py with simulated Streamlit sessions")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="concurrency levels to sweep")
+    parser.add_argument("--flows", type=int, default=1, help="full page flows per session at each level")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub provider latency in seconds")
+    parser.add_argument("--timeout", type=float, default=120, help="per-page timeout in seconds")
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--provider-rpm", type=float, default=100000,
+                        help="scheduler limit per provider; lower it to include rate limiting in the test")
+    args = parser.parse_args()
+
+    # Must be set before any engine or scheduler module is imported
+    os.environ["LLM_BACKEND"] = "stub"
+    os.environ["STUB_LATENCY_SECONDS"] = str(args.latency)
+    os.environ.setdefault("SESSION_CALLS_PER_HOUR", "0")
+    for provider in ("GEMINI", "SERPER", "YOUTUBE"):
+        os.environ[f"{provider}_CALLS_PER_MINUTE"] = str(args.provider_rpm)
+    os.environ.setdefault("VIDEO_CACHE_PATH", "")
+
+    with open(RESUME_PATH, "rb") as f:
+        resume_bytes = f.read()
+
+    # Import the app and engines once so the first level does not pay for it
+    print("Warming up...")
+    run_level(1, 1, resume_bytes, args.timeout, args.poll_interval)
+
+    results = []
+    for level in args.levels:
+        result = run_level(level, args.flows, resume_bytes, args.timeout, args.poll_interval)
+        results.append(result)
+        print_report(result)
+
+        saturation = find_saturation(results)
+        if saturation is not None:
+            print(f"\nInstance saturates at about {saturation} concurrent sessions.")
+            break
+    else:
+        print(f"\nNo saturation up to {args.levels[-1]} concurrent sessions.")
@@ -1,12 +1,36 @@
 import streamlit as st
 import os
-from job_search import JobSearchEngine
-from cover_letter import CoverLetterGenerator
-from resume_analyzer import ResumeAnalyzer
-from youtube_recommender import YouTubeRecommender
-import PyPDF2
-import re
-import io
+import uuid
+from dataclasses import asdict
+from dotenv import load_dotenv
+
+# Before the modules below build their singletons from the environment
+load_dotenv()
+
+from pdf_extractor import content_hash, load_resume, extraction_cache
+from task_manager import task_manager, DONE
+from job_browser import SORT_OPTIONS, facet_values, query_jobs
+from scheduler import scheduler, request_context, INTERACTIVE
+from speculation import speculator
+from session_store import session_store
+
+# Engine modules are imported on first use, so a cold session only pays
+# for the pages it actually opens
+def job_search_engine():
+    from job_search import JobSearchEngine
+    return JobSearchEngine()
+
+def cover_letter_generator():
+    from cover_letter import CoverLetterGenerator
+    return CoverLetterGenerator()
+
+def resume_analyzer():
+    from resume_analyzer import ResumeAnalyzer
+    return ResumeAnalyzer()
+
+def youtube_recommender():
+    from youtube_recommender import YouTubeRecommender
+    return YouTubeRecommender()
 
 # Page configuration
 st.set_page_config(
@@ -17,31 +41,22 @@ st.set_page_config(
 )
 
 # Initialize session state
-if 'job_results' not in st.session_state:
-    st.session_state.job_results = []
-if 'resume_content' not in st.session_state:
-    st.session_state.resume_content = ""
+# Resume text, job results and generated content live in the shared session
+# store (see session_artifact); session state only holds small values
 if 'selected_job' not in st.session_state:
     st.session_state.selected_job = None
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "Job Search"
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF file"""
-    try:
-        # Create a PDF reader object
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        
-        # Extract text from all pages
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
-    except Exception as e:
-        st.error(f"Error reading PDF: {str(e)}")
-        return None
+if 'job_page' not in st.session_state:
+    st.session_state.job_page = 1
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.seen_finished_tasks = set()
+if 'resume_digest' not in st.session_state:
+    st.session_state.resume_digest = None
+    st.session_state.resume_file_id = None
+    st.session_state.resume_preview = ""
+    st.session_state.resume_from_cache = False
 
 def main():
     st.title("🤖 AI Job Search Assistant")
@@ -74,25 +89,9 @@ def main():
     )
     
     if uploaded_file is not None:
-        if uploaded_file.type == "application/pdf":
-            with st.spinner("Reading PDF..."):
-                # Extract text from PDF
-                extracted_text = extract_text_from_pdf(uploaded_file)
-                
-                if extracted_text:
-                    st.session_state.resume_content = extracted_text
-                    st.sidebar.success("✅ Resume uploaded and processed successfully!")
-                    
-                    # Show preview of extracted text
-                    with st.sidebar.expander("📄 Preview Extracted Text"):
-                        preview_text = extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text
-                        st.text_area("", value=preview_text, height=150, disabled=True)
-                else:
-                    st.sidebar.error("❌ Failed to extract text from PDF. Please try again.")
-        else:
-            # Handle text file
-            st.session_state.resume_content = str(uploaded_file.read(), "utf-8")
-            st.sidebar.success("✅ Resume uploaded successfully!")
+        handle_resume_upload(uploaded_file)
+    else:
+        speculator.stop(st.session_state.session_id)
     
     # Main content based on selected page
     if page == "Job Search":
@@ -103,11 +102,178 @@ def main():
         cover_letter_page()
     elif page == "YouTube Courses":
         youtube_courses_page()
+    
+    with st.sidebar:
+        background_tasks_panel()
+        memory_profile_panel()
+
+def start_task(task_id, label, fn, *args, **kwargs):
+    """Run a pipeline in the background so it survives reruns and page switches."""
+    # Calls made by the task are attributed to this session as interactive work
+    with request_context(session_id=st.session_state.session_id, priority=INTERACTIVE):
+        return task_manager.submit(
+            st.session_state.session_id,
+            task_id,
+            fn,
+            *args,
+            label=label,
+            meta={'resume_digest': st.session_state.resume_digest},
+            **kwargs
+        )
+
+def collect_task(task_id):
+    """Return a finished task exactly once, showing its progress while it runs."""
+    task = task_manager.get(st.session_state.session_id, task_id)
+    if task is None:
+        return None
+    
+    if not task.finished:
+        st.progress(task.progress, text=f"⏳ {task.label}... {task.message}")
+        return None
+    
+    task = task_manager.pop_finished(st.session_state.session_id, task_id)
+    if task and task.status != DONE:
+        st.error(f"❌ {task.label} failed: {task.error}")
+        return None
+    return task
+
+def session_artifact(name, default=None):
+    """A large per-session value; `default` if it was never stored or was evicted to stay in budget."""
+    return session_store.get(st.session_state.session_id, name, default)
+
+def store_artifact(name, value):
+    session_store.put(st.session_state.session_id, name, value)
+
+def current_resume():
+    return session_artifact('resume_content', "")
+
+def has_resume():
+    """Cheap check for page guards; reruns should not decompress the resume."""
+    return session_store.contains(st.session_state.session_id, 'resume_content')
+
+def save_task_result(task, name, value):
+    """Store a result under the resume the task was started for."""
+    store_artifact(f"results/{task.meta['resume_digest']}/{name}", value)
+
+@st.fragment(run_every=2)
+def background_tasks_panel():
+    tasks = task_manager.tasks_for(st.session_state.session_id)
+    if not tasks:
+        return
+    
+    st.markdown("### ⏳ Background Tasks")
+    for task in tasks:
+        if task.finished:
+            icon = "✅" if task.status == DONE else "❌"
+            st.caption(f"{icon} {task.label}")
+        else:
+            st.progress(task.progress, text=task.label)
+    
+    with st.expander("📈 API Scheduler"):
+        metrics = scheduler.metrics()
+        for provider, stats in metrics['providers'].items():
+            queued = sum(stats['queue_depth'].values())
+            st.caption(
+                f"**{provider}**: {queued} queued, {stats['granted']} sent, "
+                f"p95 wait {stats['wait_p95_seconds']}s"
+            )
+        st.caption(f"**coalesced**: {metrics['coalescing']['coalesced']} duplicate calls shared an in-flight result")
+    
+    # Rerun the whole page once a task finishes so its results get rendered;
+    # task IDs are reused across runs, so each submission is tracked separately
+    finished = {(task.task_id, task.submitted_at) for task in tasks if task.finished}
+    if finished - st.session_state.seen_finished_tasks:
+        st.session_state.seen_finished_tasks = finished
+        st.rerun()
+
+def memory_profile_panel():
+    with st.expander("🧠 Memory Profile"):
+        profile = session_store.profile()
+        mine = profile['sessions'].get(st.session_state.session_id)
+        if mine:
+            st.caption(
+                f"**This session**: {mine['bytes'] / 1024:.1f} KB of {profile['session_budget_bytes'] / 1024:.0f} KB budget, "
+                f"{mine['shared_bytes'] / 1024:.1f} KB shared with other sessions"
+            )
+            st.dataframe(
+                [{'artifact': name, 'KB': round(size / 1024, 1)} for name, size in mine['artifacts'].items()],
+                hide_index=True
+            )
+        st.caption(
+            f"**All sessions**: {len(profile['sessions'])} sessions, {profile['stored_bytes'] / 1024:.1f} KB stored "
+            f"({profile['uncompressed_bytes'] / 1024:.1f} KB uncompressed, {profile['referenced_bytes'] / 1024:.1f} KB without sharing), "
+            f"{profile['session_evictions']} sessions and {profile['artifact_evictions']} artifacts evicted"
+        )
+        st.dataframe(
+            sorted(
+                [
+                    {'session': session_id[:8], 'KB': round(info['bytes'] / 1024, 1), 'idle (s)': info['idle_seconds']}
+                    for session_id, info in profile['sessions'].items()
+                ],
+                key=lambda row: row['KB'],
+                reverse=True
+            ),
+            hide_index=True
+        )
+
+def handle_resume_upload(uploaded_file):
+    # Reruns with the same upload are no-ops. A new upload is hashed and only
+    # new content is parsed, or text the session store evicted is read back
+    # (usually from the extraction cache)
+    stored = has_resume()
+    if uploaded_file.file_id != st.session_state.resume_file_id or not stored:
+        data = uploaded_file.getvalue()
+        if content_hash(data) != st.session_state.resume_digest or not stored:
+            try:
+                with st.spinner("Reading resume..."):
+                    extracted_text, digest, from_cache = load_resume(data, uploaded_file.type)
+            except Exception as e:
+                st.sidebar.error(f"❌ Error reading resume: {str(e)}")
+                return
+            
+            if not extracted_text:
+                st.sidebar.error("❌ Failed to extract text from PDF. Please try again.")
+                return
+            
+            store_artifact('resume_content', extracted_text)
+            st.session_state.resume_digest = digest
+            st.session_state.resume_preview = extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text
+            st.session_state.resume_from_cache = from_cache
+        st.session_state.resume_file_id = uploaded_file.file_id
+    
+    st.sidebar.success("✅ Resume uploaded and processed successfully!")
+    
+    speculate = st.sidebar.checkbox(
+        "⚡ Precompute on upload",
+        key="speculate",
+        help="Start job profile and learning keyword extraction in the background as soon as a resume is uploaded"
+    )
+    if speculate:
+        # start() is idempotent, but skipping it spares reading the resume back on every rerun
+        if not speculator.active(st.session_state.session_id, st.session_state.resume_digest):
+            speculator.start(st.session_state.session_id, st.session_state.resume_digest, current_resume())
+    else:
+        speculator.stop(st.session_state.session_id)
+    
+    # Show preview of extracted text
+    with st.sidebar.expander("📄 Preview Extracted Text"):
+        st.text_area("", value=st.session_state.resume_preview, height=150, disabled=True)
+    
+    with st.sidebar.expander("⏱️ Extraction Cache"):
+        metrics = extraction_cache.snapshot()
+        st.caption("Served from cache" if st.session_state.resume_from_cache else "Parsed fresh")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Cache Hits", metrics['hits'])
+            st.metric("Time Saved", f"{metrics['seconds_saved']:.2f}s")
+        with col2:
+            st.metric("Cache Misses", metrics['misses'])
+            st.metric("Cached Files", metrics['entries'])
 
 def job_search_page():
     st.header("🔍 Job Search")
     
-    if not st.session_state.resume_content:
+    if not has_resume():
         st.warning("Please upload your resume first using the sidebar.")
         return
     
@@ -115,37 +281,90 @@ def job_search_page():
     
     with col1:
         location = st.text_input("Job Location", value="Remote", placeholder="e.g., Remote, New York, San Francisco")
+        extra_locations = st.text_area(
+            "Additional Locations (one per line)",
+            placeholder="New York\nAustin",
+            help="Searched together with the location above; job profiles are extracted and results structured only once",
+            height=80
+        )
     
     with col2:
         search_button = st.button("🔍 Search Jobs", type="primary")
     
-    if search_button and location:
-        with st.spinner("Searching for jobs... This may take a few moments."):
-            try:
-                job_engine = JobSearchEngine()
-                st.session_state.job_results = job_engine.run_job_search(
-                    st.session_state.resume_content, 
-                    location
-                )
-                
-                if st.session_state.job_results:
-                    st.success(f"Found {len(st.session_state.job_results)} job opportunities!")
-                else:
-                    st.info("No job listings found. Try adjusting your search criteria.")
-                    
-            except Exception as e:
-                st.error(f"An error occurred during job search: {str(e)}")
+    search_locations = [line.strip() for line in [location, *extra_locations.splitlines()] if line.strip()]
+    if search_button and search_locations:
+        digest = st.session_state.resume_digest
+        start_task(
+            "job_search",
+            f"Searching jobs in {', '.join(search_locations)}",
+            lambda resume_content: job_search_engine().run_multi_location_search(
+                resume_content,
+                search_locations,
+                job_profiles=speculator.result(digest, 'job_profiles')
+            ),
+            current_resume()
+        )
+    
+    task = collect_task("job_search")
+    if task:
+        store_artifact('job_results', task.result)
+        session_store.delete(st.session_state.session_id, 'bulk_cover_letters')
+        
+        if task.result:
+            st.success(f"Found {len(task.result)} job opportunities!")
+        else:
+            st.info("No job listings found. Try adjusting your search criteria.")
     
     # Display job results
-    if st.session_state.job_results:
+    jobs = session_artifact('job_results', [])
+    if jobs:
         st.markdown("### Job Results")
         
-        for i, job in enumerate(st.session_state.job_results):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            companies = st.multiselect("Company", facet_values(jobs, 'company'), key="job_filter_company")
+        with col2:
+            locations = st.multiselect("Location", facet_values(jobs, 'location'), key="job_filter_location")
+        with col3:
+            text = st.text_input("Keyword", placeholder="e.g., Python, senior", key="job_filter_text")
+        
+        # Results from a multi-location search can also be narrowed to the searched locations they matched
+        searched = facet_values([job for job in jobs if job.get('matched_locations')], 'matched_locations')
+        searched_locations = []
+        if len(searched) > 1:
+            searched_locations = st.multiselect("Searched Location", searched, key="job_filter_searched_location")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_by = st.selectbox("Sort by", list(SORT_OPTIONS), key="job_sort")
+        with col2:
+            page_size = st.selectbox("Per page", [10, 25, 50], key="job_page_size")
+        
+        # Start from the first page whenever the filters change
+        view_key = (tuple(companies), tuple(locations), text, tuple(searched_locations), sort_by, page_size, len(jobs))
+        if st.session_state.get('job_view_key') != view_key:
+            st.session_state.job_view_key = view_key
+            st.session_state.job_page = 1
+        
+        view = query_jobs(
+            jobs, companies, locations, text, sort_by, st.session_state.job_page, page_size,
+            searched_locations=searched_locations
+        )
+        st.session_state.job_page = view['page']
+        with col3:
+            st.number_input(f"Page (of {view['page_count']})", min_value=1, max_value=view['page_count'], step=1, key="job_page")
+        
+        st.caption(f"Showing {len(view['items'])} of {view['total']} matching jobs ({len(jobs)} total)")
+        
+        # Only the visible page gets widgets
+        for i, job in view['items']:
             with st.expander(f"🏢 {job.get('title', 'N/A')} at {job.get('company', 'N/A')}"):
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
                     st.write(f"**Location:** {job.get('location', 'N/A')}")
+                    if len(job.get('matched_locations') or []) > 1:
+                        st.write(f"**Found in searches for:** {', '.join(job['matched_locations'])}")
                     st.write(f"**Why it's a good fit:** {job.get('relevance_reason', 'N/A')}")
                     if job.get('link', '#') != '#':
                         st.markdown(f"[View Job Posting]({job.get('link')})")
@@ -156,15 +375,111 @@ def job_search_page():
                         st.session_state.selected_job = job
                         st.session_state.current_page = "Cover Letter Generator"
                         st.rerun()
+        
+        bulk_cover_letter_section(jobs)
+
+def bulk_cover_letter_section(jobs):
+    st.markdown("### 📦 Bulk Cover Letters")
+    st.caption("Generate a cover letter for every job above and download them as one zip file.")
+    
+    results = session_artifact('bulk_cover_letters', [])
+    if len(results) != len(jobs):
+        results = [None] * len(jobs)
+    
+    failed_indices = [i for i, result in enumerate(results) if result and result['status'] == 'failed']
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        generate_all = st.button(f"📝 Generate All ({len(jobs)})", key="bulk_generate_all")
+    with col2:
+        retry_failed = st.button(
+            f"🔁 Retry Failed ({len(failed_indices)})",
+            key="bulk_retry_failed",
+            disabled=not failed_indices
+        )
+    two_stage = st.checkbox(
+        "⚡ Fast mode",
+        value=False,
+        key="bulk_fast_mode",
+        help="Reuse a compact summary of your resume instead of sending the full resume for every letter"
+    )
+    
+    if generate_all:
+        pending = list(range(len(jobs)))
+        results = [None] * len(jobs)
+    elif retry_failed:
+        pending = failed_indices
+    else:
+        pending = []
+    
+    if pending:
+        start_task(
+            "bulk_cover_letters",
+            f"Generating {len(pending)} cover letters",
+            run_bulk_cover_letters,
+            current_resume(),
+            jobs,
+            pending,
+            results,
+            two_stage,
+            with_progress=True
+        )
+    
+    task = collect_task("bulk_cover_letters")
+    if task:
+        results = task.result
+        store_artifact('bulk_cover_letters', results)
+    
+    if not any(results):
+        return
+    
+    succeeded = [result for result in results if result and result['status'] == 'ok']
+    failed = [result for result in results if result and result['status'] == 'failed']
+    
+    if succeeded:
+        from cover_letter import package_cover_letters
+        st.success(f"Generated {len(succeeded)} of {len(jobs)} cover letters.")
+        st.download_button(
+            label="📥 Download All Cover Letters (.zip)",
+            data=package_cover_letters(results),
+            file_name="cover_letters.zip",
+            mime="application/zip",
+            key="bulk_download_zip"
+        )
+    
+    for result in failed:
+        st.error(f"❌ {result['job'].get('title', 'N/A')} at {result['job'].get('company', 'N/A')}: {result['error']}")
+
+def run_bulk_cover_letters(resume_content, jobs, pending, previous_results, two_stage, progress):
+    """Background task body: generate letters for the `pending` job indices, keeping earlier results."""
+    results = list(previous_results)
+    done = []
+    
+    def on_result(batch_index, result):
+        results[pending[batch_index]] = result
+        done.append(result)
+        icon = "✅" if result['status'] == 'ok' else "❌"
+        progress(len(done) / len(pending), f"{icon} {result['job'].get('title', 'N/A')} ({len(done)}/{len(pending)})")
+    
+    cover_letter_generator().generate_bulk(
+        resume_content, [jobs[i] for i in pending], on_result=on_result, two_stage=two_stage
+    )
+    return results
+
+def resume_results():
+    """Results generated for the current resume, keyed by its content hash."""
+    return session_store.items(st.session_state.session_id, f"results/{st.session_state.resume_digest}/")
 
 def resume_analyzer_page():
     st.header("📊 AI-Powered Resume Analyzer")
     st.markdown("Get comprehensive analysis from our AI career expert powered by Google Gemini")
     
-    if not st.session_state.resume_content:
+    if not has_resume():
         st.warning("Please upload your resume first using the sidebar.")
         return
     
+    results = resume_results()
+    
     # Optional target role input
     target_role = st.text_input(
         "Target Role (Optional)", 
@@ -174,154 +489,180 @@ def resume_analyzer_page():
     
     col1, col2 = st.columns([2, 1])
     with col1:
-        analyze_button = st.button("🤖 Analyze with AI", type="primary", key="analyze_resume")
+        analyze_label = "🔄 Re-analyze with AI" if 'analysis' in results else "🤖 Analyze with AI"
+        analyze_button = st.button(analyze_label, type="primary", key="analyze_resume")
     with col2:
         detailed_recs = st.button("📋 Get Detailed Recommendations", key="detailed_recs")
     
     if analyze_button:
-        with st.spinner("🤖 AI is analyzing your resume... This may take 30-60 seconds for thorough analysis."):
-            try:
-                analyzer = ResumeAnalyzer()
-                analysis = analyzer.analyze_resume(st.session_state.resume_content)
-                st.session_state.analysis_result = analysis
-                
-                # ATS Score with color coding
-                score = analysis.get('ats_score', 0)
-                score_color = "🟢" if score >= 80 else "🟡" if score >= 60 else "🔴"
-                
-                st.markdown(f"## {score_color} ATS Compatibility Score: {score}/100")
-                
-                # Score interpretation
-                if score >= 90:
-                    st.success("🎉 Exceptional! Your resume is highly optimized for ATS systems.")
-                elif score >= 80:
-                    st.success("✅ Great! Your resume should perform well in most ATS systems.")
-                elif score >= 70:
-                    st.warning("⚠️ Good foundation, but some improvements needed for better ATS performance.")
-                elif score >= 60:
-                    st.warning("⚠️ Moderate ATS compatibility. Several improvements recommended.")
-                else:
-                    st.error("❌ Low ATS compatibility. Significant improvements needed.")
-                
-                # Detailed score breakdown if available
-                if analysis.get('score_breakdown'):
-                    st.markdown("### Score Breakdown")
-                    breakdown = analysis['score_breakdown']
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Formatting", f"{breakdown.get('formatting_score', 0)}/25")
-                    with col2:
-                        st.metric("Keywords", f"{breakdown.get('keyword_optimization', 0)}/25")
-                    with col3:
-                        st.metric("Content Quality", f"{breakdown.get('content_quality', 0)}/25")
-                    with col4:
-                        st.metric("ATS Compatibility", f"{breakdown.get('ats_compatibility', 0)}/25")
-                
-                # Key metrics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Keywords Found", analysis.get('keyword_count', 'N/A'))
-                with col2:
-                    st.metric("Resume Sections", analysis.get('section_count', 'N/A'))
-                with col3:
-                    if analysis.get('achievement_analysis'):
-                        st.metric("Quantified Achievements", analysis['achievement_analysis'].get('quantified_achievements', 'N/A'))
-                
-                # Strengths
-                if analysis.get('strengths'):
-                    st.markdown("### ✅ Key Strengths")
-                    for i, strength in enumerate(analysis['strengths'], 1):
-                        st.success(f"**{i}.** {strength}")
-                
-                # Critical improvements
-                if analysis.get('critical_improvements'):
-                    st.markdown("### 🎯 Priority Improvements")
-                    for i, improvement in enumerate(analysis['critical_improvements'], 1):
-                        st.error(f"**{i}.** {improvement}")
-                
-                # Top 3 priorities
-                if analysis.get('top_3_priorities'):
-                    st.markdown("### 🚀 Top 3 Action Items")
-                    for i, priority in enumerate(analysis['top_3_priorities'], 1):
-                        st.info(f"**Priority {i}:** {priority}")
-                
-                # ATS Red Flags
-                if analysis.get('ats_red_flags'):
-                    st.markdown("### ⚠️ ATS Red Flags")
-                    for flag in analysis['ats_red_flags']:
-                        st.warning(f"🚩 {flag}")
-                
-                # Missing Keywords
-                if analysis.get('missing_keywords'):
-                    st.markdown("### 🔍 Recommended Keywords to Add")
-                    keywords_text = ", ".join(analysis['missing_keywords'])
-                    st.info(f"**Keywords:** {keywords_text}")
-                    
-                    if st.button("📋 Copy Keywords", key="copy_keywords"):
-                        st.success("Keywords copied to clipboard! (Feature would work in deployed app)")
-                
-                # Overall Assessment
-                if analysis.get('overall_assessment'):
-                    st.markdown("### 📝 AI Expert Assessment")
-                    st.markdown(f"> {analysis['overall_assessment']}")
-                
-                # Industry Alignment
-                if analysis.get('industry_alignment'):
-                    st.markdown("### 🎯 Industry Alignment")
-                    st.info(analysis['industry_alignment'])
-                
-            except Exception as e:
-                st.error(f"❌ Analysis failed: {str(e)}")
-                st.info("💡 Try uploading your resume again or check your API keys in .env file")
+        start_task(
+            "analysis",
+            "🤖 AI is analyzing your resume (30-60 seconds)",
+            lambda resume_content: resume_analyzer().analyze_resume(resume_content),
+            current_resume()
+        )
     
-    # Detailed Recommendations
-    if detailed_recs and st.session_state.resume_content:
-        with st.spinner("🎯 Generating detailed improvement recommendations..."):
-            try:
-                analyzer = ResumeAnalyzer()
-                recommendations = analyzer.get_detailed_recommendations(
-                    st.session_state.resume_content, 
-                    target_role if target_role else None
-                )
-                
-                st.markdown("## 📋 Detailed Improvement Recommendations")
-                
-                # Immediate Actions
-                if recommendations.get('immediate_actions'):
-                    st.markdown("### ⚡ Immediate Actions")
-                    for i, action in enumerate(recommendations['immediate_actions'], 1):
-                        st.success(f"**{i}.** {action}")
-                
-                # Content Improvements
-                if recommendations.get('content_improvements'):
-                    st.markdown("### 📝 Content Improvements")
-                    for improvement in recommendations['content_improvements']:
-                        st.info(f"💡 {improvement}")
-                
-                # Keyword Strategy
-                if recommendations.get('keyword_strategy'):
-                    st.markdown("### 🔍 Keyword Strategy")
-                    for strategy in recommendations['keyword_strategy']:
-                        st.info(f"🎯 {strategy}")
-                
-                # Achievement Examples
-                if recommendations.get('achievement_examples'):
-                    st.markdown("### 🏆 Achievement Enhancement Examples")
-                    for example in recommendations['achievement_examples']:
-                        st.success(f"✨ {example}")
-                
-            except Exception as e:
-                st.error(f"❌ Could not generate recommendations: {str(e)}")
+    task = collect_task("analysis")
+    if task:
+        save_task_result(task, 'analysis', task.result)
+        results = resume_results()
+    
+    if 'analysis' in results:
+        render_analysis(results['analysis'])
+    else:
+        local_metrics = speculator.result(st.session_state.resume_digest, 'local_metrics', wait=False)
+        if local_metrics:
+            st.markdown("### ⚡ Quick Metrics")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Words", local_metrics['word_count'])
+            with col2:
+                st.metric("Resume Sections", local_metrics['section_count'])
+            with col3:
+                st.metric("Quantified Achievements", local_metrics['quantified_achievements'])
+            with col4:
+                st.metric("Action Verbs", local_metrics['action_verbs_used'])
+    
+    # Detailed Recommendations, cached per target role
+    role_key = target_role.strip().lower()
+    
+    if detailed_recs:
+        start_task(
+            f"recommendations:{role_key}",
+            "🎯 Generating detailed improvement recommendations",
+            lambda resume_content: resume_analyzer().get_detailed_recommendations(resume_content, target_role if target_role else None),
+            current_resume()
+        )
     
-    # Show previous analysis if available
-    if 'analysis_result' in st.session_state and not analyze_button:
-        st.info("💡 Previous analysis available. Click 'Analyze with AI' for a fresh analysis.")
+    task = collect_task(f"recommendations:{role_key}")
+    if task:
+        recommendations_by_role = session_artifact(f"results/{task.meta['resume_digest']}/recommendations", {})
+        recommendations_by_role[role_key] = task.result
+        save_task_result(task, 'recommendations', recommendations_by_role)
+        results = resume_results()
+    
+    recommendations_by_role = results.get('recommendations', {})
+    if role_key in recommendations_by_role:
+        render_recommendations(recommendations_by_role[role_key])
+
+def render_analysis(analysis):
+    # ATS Score with color coding
+    score = analysis.get('ats_score', 0)
+    score_color = "🟢" if score >= 80 else "🟡" if score >= 60 else "🔴"
+
+    st.markdown(f"## {score_color} ATS Compatibility Score: {score}/100")
+
+    # Score interpretation
+    if score >= 90:
+        st.success("🎉 Exceptional! Your resume is highly optimized for ATS systems.")
+    elif score >= 80:
+        st.success("✅ Great! Your resume should perform well in most ATS systems.")
+    elif score >= 70:
+        st.warning("⚠️ Good foundation, but some improvements needed for better ATS performance.")
+    elif score >= 60:
+        st.warning("⚠️ Moderate ATS compatibility. Several improvements recommended.")
+    else:
+        st.error("❌ Low ATS compatibility. Significant improvements needed.")
+
+    # Detailed score breakdown if available
+    if analysis.get('score_breakdown'):
+        st.markdown("### Score Breakdown")
+        breakdown = analysis['score_breakdown']
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Formatting", f"{breakdown.get('formatting_score', 0)}/25")
+        with col2:
+            st.metric("Keywords", f"{breakdown.get('keyword_optimization', 0)}/25")
+        with col3:
+            st.metric("Content Quality", f"{breakdown.get('content_quality', 0)}/25")
+        with col4:
+            st.metric("ATS Compatibility", f"{breakdown.get('ats_compatibility', 0)}/25")
+
+    # Key metrics
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Keywords Found", analysis.get('keyword_count', 'N/A'))
+    with col2:
+        st.metric("Resume Sections", analysis.get('section_count', 'N/A'))
+    with col3:
+        if analysis.get('achievement_analysis'):
+            st.metric("Quantified Achievements", analysis['achievement_analysis'].get('quantified_achievements', 'N/A'))
+
+    # Strengths
+    if analysis.get('strengths'):
+        st.markdown("### ✅ Key Strengths")
+        for i, strength in enumerate(analysis['strengths'], 1):
+            st.success(f"**{i}.** {strength}")
+
+    # Critical improvements
+    if analysis.get('critical_improvements'):
+        st.markdown("### 🎯 Priority Improvements")
+        for i, improvement in enumerate(analysis['critical_improvements'], 1):
+            st.error(f"**{i}.** {improvement}")
+
+    # Top 3 priorities
+    if analysis.get('top_3_priorities'):
+        st.markdown("### 🚀 Top 3 Action Items")
+        for i, priority in enumerate(analysis['top_3_priorities'], 1):
+            st.info(f"**Priority {i}:** {priority}")
+
+    # ATS Red Flags
+    if analysis.get('ats_red_flags'):
+        st.markdown("### ⚠️ ATS Red Flags")
+        for flag in analysis['ats_red_flags']:
+            st.warning(f"🚩 {flag}")
+
+    # Missing Keywords
+    if analysis.get('missing_keywords'):
+        st.markdown("### 🔍 Recommended Keywords to Add")
+        keywords_text = ", ".join(analysis['missing_keywords'])
+        st.info(f"**Keywords:** {keywords_text}")
+
+        if st.button("📋 Copy Keywords", key="copy_keywords"):
+            st.success("Keywords copied to clipboard! (Feature would work in deployed app)")
+
+    # Overall Assessment
+    if analysis.get('overall_assessment'):
+        st.markdown("### 📝 AI Expert Assessment")
+        st.markdown(f"> {analysis['overall_assessment']}")
+
+    # Industry Alignment
+    if analysis.get('industry_alignment'):
+        st.markdown("### 🎯 Industry Alignment")
+        st.info(analysis['industry_alignment'])
+
+def render_recommendations(recommendations):
+    st.markdown("## 📋 Detailed Improvement Recommendations")
+
+    # Immediate Actions
+    if recommendations.get('immediate_actions'):
+        st.markdown("### ⚡ Immediate Actions")
+        for i, action in enumerate(recommendations['immediate_actions'], 1):
+            st.success(f"**{i}.** {action}")
+
+    # Content Improvements
+    if recommendations.get('content_improvements'):
+        st.markdown("### 📝 Content Improvements")
+        for improvement in recommendations['content_improvements']:
+            st.info(f"💡 {improvement}")
+
+    # Keyword Strategy
+    if recommendations.get('keyword_strategy'):
+        st.markdown("### 🔍 Keyword Strategy")
+        for strategy in recommendations['keyword_strategy']:
+            st.info(f"🎯 {strategy}")
+
+    # Achievement Examples
+    if recommendations.get('achievement_examples'):
+        st.markdown("### 🏆 Achievement Enhancement Examples")
+        for example in recommendations['achievement_examples']:
+            st.success(f"✨ {example}")
 
 def cover_letter_page():
     st.header("📝 Cover Letter Generator")
     
-    if not st.session_state.resume_content:
+    if not has_resume():
         st.warning("Please upload your resume first using the sidebar.")
         return
     
@@ -364,180 +705,122 @@ def cover_letter_page():
                 height=100
             )
         
+        two_stage = st.checkbox(
+            "⚡ Fast mode",
+            value=False,
+            help="Reuse a compact summary of your resume instead of sending the full resume for every letter"
+        )
+        
         submit_button = st.form_submit_button("📝 Generate Cover Letter", type="primary")
     
+    results = resume_results()
+    
     if submit_button and job_title and company_name:
-        with st.spinner("Crafting your personalized cover letter..."):
-            try:
-                generator = CoverLetterGenerator()
-                cover_letter = generator.generate_cover_letter(
-                    resume_content=st.session_state.resume_content,
+        start_task(
+            "cover_letter",
+            f"Crafting cover letter for {job_title} at {company_name}",
+            lambda resume_content: {
+                'job_title': job_title,
+                'company_name': company_name,
+                'content': cover_letter_generator().generate_cover_letter(
+                    resume_content=resume_content,
                     job_title=job_title,
                     company_name=company_name,
                     hiring_manager=hiring_manager,
-                    job_description=job_description
-                )
-                
-                st.markdown("### Your Cover Letter")
-                st.text_area("", value=cover_letter, height=400, disabled=True)
-                
-                # Download button
-                st.download_button(
-                    label="📥 Download Cover Letter",
-                    data=cover_letter,
-                    file_name=f"cover_letter_{company_name}_{job_title}.txt",
-                    mime="text/plain"
+                    job_description=job_description,
+                    two_stage=two_stage
                 )
-                
-                # Clear the selected job after generating cover letter
-                if st.session_state.selected_job:
-                    st.session_state.selected_job = None
-                
-            except Exception as e:
-                st.error(f"An error occurred while generating the cover letter: {str(e)}")
+            },
+            current_resume()
+        )
+        
+        # Clear the selected job after generating cover letter
+        if st.session_state.selected_job:
+            st.session_state.selected_job = None
+    
+    task = collect_task("cover_letter")
+    if task:
+        save_task_result(task, 'cover_letter', task.result)
+        results = resume_results()
+    
+    if 'cover_letter' in results:
+        letter = results['cover_letter']
+        st.markdown(f"### Your Cover Letter: {letter['job_title']} at {letter['company_name']}")
+        st.text_area("", value=letter['content'], height=400, disabled=True)
+        
+        # Download button
+        st.download_button(
+            label="📥 Download Cover Letter",
+            data=letter['content'],
+            file_name=f"cover_letter_{letter['company_name']}_{letter['job_title']}.txt",
+            mime="text/plain"
+        )
 
 def youtube_courses_page():
     st.header("📺 YouTube Course Recommendations")
     st.markdown("Get personalized learning recommendations based on your resume")
 
-    if not st.session_state.resume_content:
+    if not has_resume():
         st.warning("Please upload your resume first using the sidebar.")
         return
 
-    if st.button("🔍 Get Course Recommendations", type="primary"):
-        with st.spinner("Finding the best courses for you..."):
-            try:
-                recommender = YouTubeRecommender()
-                results = recommender.get_recommendations(st.session_state.resume_content)
-
-                st.success("Found personalized course recommendations!")
-
-                # Show generated keywords
-                st.markdown("### 🎯 Focus Areas")
-                keywords_display = " • ".join(results['keywords'])
-                st.info(f"**Learning Keywords:** {keywords_display}")
-
-                st.markdown("### 📚 Recommended Courses")
-
-                if not results['recommendations']:
-                    st.info("No specific recommendations found. Try uploading a more detailed resume.")
-                    return
-
-                for item in results['recommendations']:
-                    st.subheader(f"Courses for: {item['keyword'].title()}")
-
-
-
-                    videos = []
-                    
-                    # Handle different possible formats
-                    if isinstance(item['videos'], str):
-                        # Try multiple regex patterns
-                        patterns = [
-                            r'\[(.*?)\]\((.*?)\)',  # Markdown links: [title](url)
-                            r'Title:\s*(.*?)\s*URL:\s*(.*?)(?:\n|$)',  # Title: ... URL: ...
-                            r'(.*?)\s*-\s*(https?://[^\s]+)',  # Title - URL
-                            r'https?://[^\s]+',  # Just URLs
-                        ]
-                        
-                        for pattern in patterns:
-                            matches = re.findall(pattern, item['videos'], re.MULTILINE | re.DOTALL)
-                            if matches:
-                                if pattern == r'https?://[^\s]+':
-                                    # Just URLs found, create generic titles
-                                    videos = [(f"Video {i+1}", url) for i, url in enumerate(matches)]
-                                else:
-                                    videos = matches
-                                break
-                        
-                        # If no regex worked, try splitting by lines and look for URLs
-                        if not videos:
-                            lines = item['videos'].split('\n')
-                            for i, line in enumerate(lines):
-                                line = line.strip()
-                                if 'youtube.com' in line or 'youtu.be' in line:
-                                    # Extract URL from line
-                                    url_match = re.search(r'https?://[^\s]+', line)
-                                    if url_match:
-                                        url = url_match.group()
-                                        # Try to extract title (everything before the URL)
-                                        title = re.sub(r'https?://[^\s]+', '', line).strip()
-                                        title = re.sub(r'^[-•*]\s*', '', title).strip()  # Remove bullet points
-                                        if not title:
-                                            title = f"Video {i+1}"
-                                        videos.append((title, url))
-                    
-                    elif isinstance(item['videos'], list):
-                        # If it's already a list, handle different list formats
-                        for video in item['videos']:
-                            if isinstance(video, dict):
-                                title = video.get('title', video.get('name', 'Untitled Video'))
-                                url = video.get('url', video.get('link', '#'))
-                                videos.append((title, url))
-                            elif isinstance(video, tuple) and len(video) >= 2:
-                                videos.append((video[0], video[1]))
-                            elif isinstance(video, str):
-                                # String in list, try to parse
-                                url_match = re.search(r'https?://[^\s]+', video)
-                                if url_match:
-                                    url = url_match.group()
-                                    title = re.sub(r'https?://[^\s]+', '', video).strip()
-                                    title = re.sub(r'^[-•*]\s*', '', title).strip()
-                                    videos.append((title or "Video", url))
-                    
-                    if not videos:
-                        st.warning("Could not parse video recommendations for this keyword.")
-                        st.text(f"Raw data: {item['videos']}")
-                        continue
-
-                    # Display videos in a grid
-                    if len(videos) == 1:
-                        cols = st.columns(1)
-                    elif len(videos) == 2:
-                        cols = st.columns(2)
-                    else:
-                        cols = st.columns(min(3, len(videos)))  # Max 3 columns
-
-                    for i, (title, url) in enumerate(videos):
-                        col_idx = i % len(cols)
-                        with cols[col_idx]:
-                            try:
-                                # Clean and validate URL
-                                url = url.strip()
-                                if not url.startswith(('http://', 'https://')):
-                                    url = 'https://' + url
-                                
-                                # Extract video ID from URL to generate thumbnail
-                                video_id = None
-                                if "youtube.com/watch?v=" in url:
-                                    video_id = url.split('v=')[1].split('&')[0]
-                                elif "youtu.be/" in url:
-                                    video_id = url.split('/')[-1].split('?')[0]
-                                
-                                if video_id:
-                                    # Generate thumbnail URL
-                                    thumbnail_url = f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
-                                    
-                                    # Display thumbnail and title
-                                    st.image(thumbnail_url, use_container_width=True)
-                                    st.markdown(f"**[{title}]({url})**")
-                                else:
-                                    # Fallback: just show the link without thumbnail
-                                    st.markdown(f"📺 **[{title}]({url})**")
-
-                            except Exception as e:
-                                st.error(f"Failed to display video '{title}': {str(e)}")
-                                # Fallback: simple link
-                                st.markdown(f"📺 [{title}]({url})")
+    results = resume_results()
+    button_label = "🔄 Refresh Course Recommendations" if 'youtube' in results else "🔍 Get Course Recommendations"
+    
+    if st.button(button_label, type="primary"):
+        start_task(
+            "youtube",
+            "Finding the best courses for you",
+            lambda resume_content, digest=st.session_state.resume_digest: youtube_recommender().get_recommendations(
+                resume_content,
+                keywords=speculator.result(digest, 'learning_keywords')
+            ),
+            current_resume()
+        )
+    
+    task = collect_task("youtube")
+    if task:
+        # VideoRecords are stored as plain dicts; the session store only holds JSON
+        save_task_result(task, 'youtube', {
+            'keywords': task.result['keywords'],
+            'recommendations': [
+                {'keyword': item['keyword'], 'videos': [asdict(video) for video in item['videos']]}
+                for item in task.result['recommendations']
+            ]
+        })
+        results = resume_results()
+        st.success("Found personalized course recommendations!")
+    
+    if 'youtube' in results:
+        render_youtube_results(results['youtube'])
 
-            except Exception as e:
-                st.error(f"Error getting recommendations: {str(e)}")
-                st.info("💡 Make sure your API keys are properly configured in .env file")
-                
-                # Additional debugging info
-                import traceback
-                with st.expander("🔍 Debug Information"):
-                    st.text(traceback.format_exc())
+def render_youtube_results(results):
+    # Show generated keywords
+    st.markdown("### 🎯 Focus Areas")
+    keywords_display = " • ".join(results['keywords'])
+    st.info(f"**Learning Keywords:** {keywords_display}")
+
+    st.markdown("### 📚 Recommended Courses")
+
+    if not results['recommendations']:
+        st.info("No specific recommendations found. Try uploading a more detailed resume.")
+        return
+
+    for item in results['recommendations']:
+        st.subheader(f"Courses for: {item['keyword'].title()}")
+        
+        # Stored as VideoRecord fields, already parsed when the results were generated
+        videos = item['videos']
+        if not videos:
+            continue
+        
+        # Display videos in a grid, max 3 columns
+        cols = st.columns(min(3, len(videos)))
+        
+        for i, video in enumerate(videos):
+            with cols[i % len(cols)]:
+                st.image(video['thumbnail_url'], use_container_width=True)
+                st.markdown(f"**[{video['title']}]({video['url']})**")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,215 @@
+"""Latency-aware routing of LLM calls to a fast or a full model tier.
+
+Every call names its task type. Short extraction tasks (job titles,
+learning keywords, candidate narratives) go to the fast tier and long-form
+generation (analyses, cover letters) to the full tier, each with an output
+token cap sized for the task. The router keeps recent latency and error
+samples per model. When the preferred model's p95 latency or error rate
+crosses its tier's threshold, calls move to the other tier until the bad
+samples age out of the window.
+
+Each routed call is recorded with its outcome for tuning. The records are
+kept in memory for `metrics()` and, when ROUTER_LOG_PATH is set, appended
+to that file as JSON lines.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Optional, Tuple
+from llm_backend import create_llm
+from scheduler import ScheduledClient
+
+FAST = "fast"
+FULL = "full"
+
+# task type -> (preferred tier, max output tokens)
+TASK_ROUTES: Dict[str, Tuple[str, int]] = {
+    'job_profiles': (FAST, 256),
+    'learning_keywords': (FAST, 128),
+    'candidate_narrative': (FAST, 512),
+    'job_structuring': (FAST, 4096),
+    'resume_analysis_brief': (FAST, 1024),
+    'resume_analysis': (FULL, 4096),
+    'resume_recommendations': (FULL, 4096),
+    'cover_letter': (FULL, 1024),
+    'cover_letter_variant': (FULL, 1024),
+}
+
+
+class ModelHealth:
+    """Latency and error samples of one model over a sliding time window."""
+
+    def __init__(self, window_seconds: float, max_samples: int = 200):
+        self.window_seconds = window_seconds
+        self._samples = deque(maxlen=max_samples)  # (timestamp, seconds, ok)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((time.time(), seconds, ok))
+
+    def snapshot(self) -> Dict[str, Any]:
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            recent = [(seconds, ok) for at, seconds, ok in self._samples if at >= cutoff]
+        latencies = sorted(seconds for seconds, ok in recent if ok)
+        return {
+            'samples': len(recent),
+            'p95_seconds': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else 0.0,
+            'error_rate': round(sum(1 for _, ok in recent if not ok) / len(recent), 3) if recent else 0.0,
+        }
+
+
+class _TimedModel:
+    """Records how long the model itself takes, excluding time queued in the scheduler."""
+
+    def __init__(self, llm: Any, health: ModelHealth):
+        self._llm = llm
+        self._health = health
+
+    def invoke(self, prompt: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self._llm.invoke(prompt)
+        except Exception:
+            self._health.record(time.perf_counter() - started, ok=False)
+            raise
+        self._health.record(time.perf_counter() - started, ok=True)
+        return response
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        tiers: Dict[str, str],
+        p95_thresholds: Dict[str, float],
+        max_error_rate: float = 0.25,
+        window_seconds: float = 300,
+        min_samples: int = 10,
+        log_path: Optional[str] = None
+    ):
+        self.tiers = tiers
+        self.p95_thresholds = p95_thresholds
+        self.max_error_rate = max_error_rate
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.log_path = log_path
+        self._health: Dict[str, ModelHealth] = {}
+        self._clients: Dict[Tuple[str, float, int], ScheduledClient] = {}
+        self._decisions = deque(maxlen=200)
+        self._routed = Counter()
+        self._lock = threading.Lock()
+
+    def route(self, task: str) -> Tuple[str, str, str]:
+        """(tier, model, reason) for a call of the given task type."""
+        preferred, _ = TASK_ROUTES.get(task, (FULL, None))
+        problem = self._problem(preferred)
+        if problem is None:
+            return preferred, self.tiers[preferred], "preferred"
+
+        alternate = FULL if preferred == FAST else FAST
+        if self.tiers[alternate] != self.tiers[preferred] and self._problem(alternate) is None:
+            return alternate, self.tiers[alternate], f"fallback: {self.tiers[preferred]} {problem}"
+        return preferred, self.tiers[preferred], f"no healthy fallback: {self.tiers[preferred]} {problem}"
+
+    def invoke(self, task: str, prompt: Any, temperature: float) -> Any:
+        tier, model, reason = self.route(task)
+        max_tokens = TASK_ROUTES.get(task, (FULL, None))[1]
+        if reason != "preferred":
+            print(f"Warning: routing '{task}' to the {tier} tier ({model}), {reason}")
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self._client(model, temperature, max_tokens).invoke(prompt)
+            ok = True
+            return response
+        finally:
+            self._record({
+                'time': round(time.time(), 3),
+                'task': task,
+                'tier': tier,
+                'model': model,
+                'reason': reason,
+                'max_output_tokens': max_tokens,
+                'wall_seconds': round(time.perf_counter() - started, 3),
+                'ok': ok,
+            })
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            health = dict(self._health)
+            decisions = list(self._decisions)[-20:]
+            routed = dict(self._routed)
+        return {
+            'tiers': dict(self.tiers),
+            'models': {model: h.snapshot() for model, h in health.items()},
+            'routed': routed,
+            'recent_decisions': decisions,
+        }
+
+    def _problem(self, tier: str) -> Optional[str]:
+        """Why the tier's model is considered unhealthy, or None."""
+        health = self._health_of(self.tiers[tier]).snapshot()
+        if health['samples'] < self.min_samples:
+            return None
+        if health['error_rate'] > self.max_error_rate:
+            return f"error rate {health['error_rate']:.0%} > {self.max_error_rate:.0%}"
+        if health['p95_seconds'] > self.p95_thresholds[tier]:
+            return f"p95 {health['p95_seconds']}s > {self.p95_thresholds[tier]}s"
+        return None
+
+    def _health_of(self, model: str) -> ModelHealth:
+        with self._lock:
+            if model not in self._health:
+                self._health[model] = ModelHealth(self.window_seconds)
+            return self._health[model]
+
+    def _client(self, model: str, temperature: float, max_tokens: Optional[int]) -> ScheduledClient:
+        key = (model, temperature, max_tokens)
+        health = self._health_of(model)
+        with self._lock:
+            if key not in self._clients:
+                kwargs = {'max_output_tokens': max_tokens} if max_tokens else {}
+                llm = _TimedModel(create_llm(model, temperature, **kwargs), health)
+                self._clients[key] = ScheduledClient(llm, "gemini", ("invoke",), settings=key)
+            return self._clients[key]
+
+    def _record(self, decision: Dict[str, Any]) -> None:
+        with self._lock:
+            self._decisions.append(decision)
+            self._routed[f"{decision['task']}->{decision['tier']}"] += 1
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(decision) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write routing log to {self.log_path}. Error: {e}")
+
+
+router = ModelRouter(
+    tiers={
+        FAST: os.getenv("FAST_TIER_MODEL", "gemini-2.0-flash-lite"),
+        FULL: os.getenv("FULL_TIER_MODEL", "gemini-2.0-flash"),
+    },
+    p95_thresholds={
+        FAST: float(os.getenv("FAST_TIER_P95_SECONDS", 10)),
+        FULL: float(os.getenv("FULL_TIER_P95_SECONDS", 45)),
+    },
+    max_error_rate=float(os.getenv("ROUTER_MAX_ERROR_RATE", 0.25)),
+    log_path=os.getenv("ROUTER_LOG_PATH") or None
+)
+
+
+class RoutedLLM:
+    """Engine-facing chat model: `invoke(prompt, task=...)` picks the model tier per call."""
+
+    def __init__(self, temperature: float, model_router: Optional[ModelRouter] = None):
+        self.temperature = temperature
+        self.router = model_router or router
+
+    def invoke(self, prompt: Any, task: str = "default") -> Any:
+        return self.router.invoke(task, prompt, self.temperature)
@@ -0,0 +1,210 @@
+import hashlib
+import mmap
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import PyPDF2
+
+# PyPDF2 is imported inside the extractors so loading the app does not pay for it
+
+# Extraction limits; pages past MAX_PAGES and text past MAX_CHARS are dropped
+MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 200))
+MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", 500_000))
+PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", 10))
+# Up to this many pages, a single worker parses the pages in order
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", 8))
+MAX_WORKERS = int(os.getenv("PDF_MAX_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def content_hash(data: bytes) -> str:
+    """Stable identifier for an uploaded file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_text_from_pdf(data: bytes) -> str:
+    """Extract text from every page of an in-memory PDF."""
+    # Spill the upload to disk so worker processes can memory-map it
+    # instead of each receiving a pickled copy of the bytes
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        return extract_text_from_file(tmp.name)
+    finally:
+        os.unlink(tmp.name)
+
+
+def extract_text_from_file(path: str) -> str:
+    """Extract text from a PDF on disk, parsing pages in parallel for large documents."""
+    return _join_pages(iter_page_texts(path))
+
+
+def extract_documents(sources: Iterable[Union[str, bytes]]) -> List[str]:
+    """Extract several PDFs (paths or bytes) with the same engine used by the UI."""
+    return [
+        extract_text_from_file(source) if isinstance(source, str) else extract_text_from_pdf(source)
+        for source in sources
+    ]
+
+
+def iter_page_texts(
+    path: str,
+    max_pages: int = MAX_PAGES,
+    page_timeout: float = PAGE_TIMEOUT_SECONDS,
+    max_workers: int = MAX_WORKERS
+) -> Iterator[str]:
+    """Yield page texts of a PDF on disk in page order.
+    
+    Pages are parsed in worker processes with a bounded number of pages in
+    flight: one worker for short documents, up to `max_workers` for longer
+    ones. A page that exceeds `page_timeout` yields an empty string instead
+    of stalling the document.
+    """
+    import PyPDF2
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        page_count = min(len(PyPDF2.PdfReader(mapped).pages), max_pages)
+    if not page_count:
+        return
+
+    workers = max(1, min(max_workers, page_count)) if page_count > PARALLEL_PAGE_THRESHOLD else 1
+    pool = None
+    pending = deque()
+    next_page = 0
+    try:
+        while next_page < page_count or pending:
+            if pool is None:
+                pool = _page_pool(path, workers)
+            while next_page < page_count and len(pending) < workers * 2:
+                pending.append(pool.apply_async(_extract_worker_page, (next_page,)))
+                next_page += 1
+
+            page_number = next_page - len(pending)
+            try:
+                text = pending.popleft().get(timeout=page_timeout)
+            except multiprocessing.TimeoutError:
+                print(f"Warning: Page {page_number + 1} of {path} timed out after {page_timeout}s, skipping it.")
+                # A pathological page can spin forever, so stop its worker and
+                # carry on from the next page with a fresh pool
+                pool.terminate()
+                pool.join()
+                pool = None
+                pending.clear()
+                next_page = page_number + 1
+                text = ""
+            except Exception as e:
+                print(f"Warning: Could not extract page {page_number + 1} of {path}. Error: {e}")
+                text = ""
+            yield text
+    finally:
+        if pool is not None:
+            if pending:
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+
+
+def _page_pool(path: str, workers: int) -> "multiprocessing.pool.Pool":
+    return multiprocessing.get_context("spawn").Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(path,)
+    )
+
+
+def _join_pages(pages: Iterable[str], max_chars: int = MAX_CHARS) -> str:
+    """Join page texts once, stopping as soon as the character cap is reached."""
+    parts = []
+    total = 0
+    for text in pages:
+        if total + len(text) >= max_chars:
+            parts.append(text[:max_chars - total])
+            break
+        parts.append(text)
+        total += len(text) + 1
+    return "\n".join(parts).strip()
+
+
+# Per-process state for pool workers: each worker maps and parses the document once
+_worker_reader: Optional["PyPDF2.PdfReader"] = None
+
+
+def _init_worker(path: str) -> None:
+    import PyPDF2
+    global _worker_reader
+    f = open(path, "rb")
+    _worker_reader = PyPDF2.PdfReader(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def _extract_worker_page(page_num: int) -> str:
+    return _worker_reader.pages[page_num].extract_text() or ""
+
+
+class ExtractionCache:
+    def __init__(self, max_entries: int = 128, max_chars: int = 20_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'extraction_seconds': 0.0,
+            'seconds_saved': 0.0,
+        }
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.metrics['misses'] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.metrics['hits'] += 1
+            self.metrics['seconds_saved'] += entry['extraction_seconds']
+            return entry['text']
+
+    def put(self, digest: str, text: str, extraction_seconds: float) -> None:
+        with self._lock:
+            if digest in self._entries:
+                self._total_chars -= len(self._entries.pop(digest)['text'])
+            self._entries[digest] = {'text': text, 'extraction_seconds': extraction_seconds}
+            self._total_chars += len(text)
+            self.metrics['extraction_seconds'] += extraction_seconds
+
+            while self._entries and (len(self._entries) > self.max_entries or self._total_chars > self.max_chars):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_chars -= len(evicted['text'])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current metrics plus cache occupancy."""
+        with self._lock:
+            return {**self.metrics, 'entries': len(self._entries), 'cached_chars': self._total_chars}
+
+
+# Process-wide, so every session uploading the same file shares one parse
+extraction_cache = ExtractionCache()
+
+
+def load_resume(data: bytes, file_type: str) -> Tuple[str, str, bool]:
+    """Return (text, content hash, served_from_cache) for an uploaded resume."""
+    digest = content_hash(data)
+
+    text = extraction_cache.get(digest)
+    if text is not None:
+        return text, digest, True
+
+    start = time.perf_counter()
+    if file_type == "application/pdf":
+        text = extract_text_from_pdf(data)
+    else:
+        text = data.decode("utf-8")
+    extraction_cache.put(digest, text, time.perf_counter() - start)
+
+    return text, digest, False
@@ -1,13 +1,40 @@
 import json
+import re
 from typing import Dict, Any
-from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
+from model_router import RoutedLLM
+from scheduler import SchedulerError
 
-load_dotenv()
+SECTION_HEADINGS = (
+    "summary", "objective", "experience", "work experience", "employment", "education",
+    "skills", "technical skills", "projects", "certifications", "awards", "publications",
+    "volunteer", "languages", "interests",
+)
+ACTION_VERBS = (
+    "led", "built", "designed", "developed", "implemented", "managed", "created", "improved",
+    "increased", "reduced", "launched", "delivered", "optimized", "automated", "architected",
+    "mentored", "drove", "owned", "scaled", "migrated",
+)
+_QUANTIFIED = re.compile(r"\d+(?:\.\d+)?\s*(?:%|percent|x\b|k\b|m\b|\+)|[$€£]\s*\d")
+_BULLET = re.compile(r"^\s*(?:[-•*▪●]|\d+\.)\s+", re.MULTILINE)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+
+
+def compute_local_metrics(resume_content: str) -> Dict[str, Any]:
+    """Quick resume statistics computed locally, without a model call."""
+    lines = [line.strip().lower().rstrip(":") for line in resume_content.splitlines()]
+    words = re.findall(r"[A-Za-z']+", resume_content.lower())
+    return {
+        'word_count': len(words),
+        'section_count': sum(1 for line in set(lines) if line in SECTION_HEADINGS),
+        'bullet_count': len(_BULLET.findall(resume_content)),
+        'quantified_achievements': len(_QUANTIFIED.findall(resume_content.lower())),
+        'action_verbs_used': sum(1 for word in words if word in ACTION_VERBS),
+        'has_email': bool(_EMAIL.search(resume_content)),
+    }
 
 class ResumeAnalyzer:
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.2)
+    def __init__(self, llm=None):
+        self.llm = llm or RoutedLLM(temperature=0.2)
     
     def analyze_resume(self, resume_content: str) -> Dict[str, Any]:
         """Comprehensive AI-powered resume analysis using Gemini as an intelligent agent."""
@@ -102,7 +129,7 @@ class ResumeAnalyzer:
         """
         
         try:
-            response = self.llm.invoke(analysis_prompt)
+            response = self.llm.invoke(analysis_prompt, task='resume_analysis')
             cleaned_response = response.content.strip()
             
             # Remove markdown code blocks if present
@@ -120,6 +147,9 @@ class ResumeAnalyzer:
             
             return analysis_result
             
+        except SchedulerError:
+            # Quota and queue timeouts are not model failures; a fallback call would hit them too
+            raise
         except (json.JSONDecodeError, ValueError, Exception) as e:
             print(f"Error in AI analysis: {e}")
             # Fallback to a secondary analysis prompt
@@ -155,7 +185,7 @@ class ResumeAnalyzer:
         """
         
         try:
-            response = self.llm.invoke(fallback_prompt)
+            response = self.llm.invoke(fallback_prompt, task='resume_analysis_brief')
             cleaned_response = response.content.strip().replace("```json", "").replace("```", "")
             return json.loads(cleaned_response)
         except:
@@ -222,9 +252,11 @@ class ResumeAnalyzer:
         """
         
         try:
-            response = self.llm.invoke(recommendations_prompt)
+            response = self.llm.invoke(recommendations_prompt, task='resume_recommendations')
             cleaned_response = response.content.strip().replace("```json", "").replace("```", "")
             return json.loads(cleaned_response)
+        except SchedulerError:
+            raise
         except:
             return self._get_basic_recommendations()
     
@@ -0,0 +1,375 @@
+"""Process-wide scheduler for outbound LLM and search calls.
+
+Every call to a provider waits here for a slot. Each provider has a token
+bucket sized to its rate limit. Waiting calls are served by priority class
+first (interactive page actions before background work before bulk jobs),
+then round-robin across sessions so one busy session cannot starve the
+rest. Sessions also have an hourly call quota.
+
+The session and priority of a call come from context variables set with
+`request_context`, so engines do not need to thread them through.
+
+Identical calls that are already in flight (same provider, client settings,
+method and arguments) are coalesced. Later callers wait for the first call's
+result instead of sending a duplicate and paying its latency and quota again.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+INTERACTIVE = 0
+BACKGROUND = 1
+BATCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", BATCH: "batch"}
+
+_session_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("scheduler_session_id", default=None)
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("scheduler_priority", default=INTERACTIVE)
+
+
+class SchedulerError(Exception):
+    pass
+
+
+class QuotaExceeded(SchedulerError):
+    pass
+
+
+class SchedulerTimeout(SchedulerError):
+    pass
+
+
+@contextmanager
+def request_context(session_id: Optional[str] = None, priority: Optional[int] = None):
+    """Attribute calls made inside the block to a session and priority class."""
+    tokens = []
+    if session_id is not None:
+        tokens.append((_session_id, _session_id.set(session_id)))
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until_available(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.paused_until - now)
+
+    def take(self) -> None:
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Stop granting for a while, e.g. after the provider reports a rate limit."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class _Ticket:
+    __slots__ = ('session_id', 'priority', 'enqueued_at', 'granted', 'event')
+
+    def __init__(self, session_id: str, priority: int):
+        self.session_id = session_id
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.event = threading.Event()
+
+
+class ProviderQueue:
+    def __init__(self, name: str, calls_per_minute: float, burst: int):
+        self.name = name
+        self.bucket = TokenBucket(calls_per_minute / 60.0, burst)
+        # priority -> session -> waiting tickets; OrderedDict gives round-robin order
+        self._lanes: Dict[int, "OrderedDict[str, deque]"] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+        self._waits = deque(maxlen=1000)
+        self.granted = 0
+        self.backoffs = 0
+        self._thread = threading.Thread(target=self._dispatch, name=f"scheduler-{name}", daemon=True)
+        self._thread.start()
+
+    def acquire(self, session_id: str, priority: int, timeout: Optional[float]) -> float:
+        """Block until this call may go out; returns seconds spent waiting."""
+        ticket = _Ticket(session_id, priority)
+        with self._cond:
+            self._lanes[priority].setdefault(session_id, deque()).append(ticket)
+            self._cond.notify()
+
+        if not ticket.event.wait(timeout):
+            with self._cond:
+                if not ticket.granted:
+                    self._remove(ticket)
+                    raise SchedulerTimeout(f"Waited more than {timeout}s for a {self.name} slot")
+        return time.monotonic() - ticket.enqueued_at
+
+    def backoff(self, seconds: float) -> None:
+        with self._cond:
+            self.bucket.pause(seconds)
+            self.backoffs += 1
+
+    def _remove(self, ticket: _Ticket) -> None:
+        lane = self._lanes[ticket.priority]
+        queue = lane.get(ticket.session_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del lane[ticket.session_id]
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority in sorted(self._lanes):
+            lane = self._lanes[priority]
+            if lane:
+                session_id, queue = lane.popitem(last=False)
+                ticket = queue.popleft()
+                if queue:
+                    lane[session_id] = queue  # back of the line for this session
+                return ticket
+        return None
+
+    def _has_waiting(self) -> bool:
+        return any(self._lanes[p] for p in self._lanes)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._cond:
+                while not self._has_waiting():
+                    self._cond.wait()
+                wait = self.bucket.seconds_until_available()
+                if wait > 0:
+                    # Woken early by new arrivals; loop re-checks the bucket
+                    self._cond.wait(wait)
+                    continue
+                ticket = self._next_ticket()
+                if ticket is None:
+                    continue
+                self.bucket.take()
+                ticket.granted = True
+                self.granted += 1
+                self._waits.append(time.monotonic() - ticket.enqueued_at)
+            ticket.event.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            depth = {PRIORITY_NAMES[p]: sum(len(q) for q in lane.values()) for p, lane in self._lanes.items()}
+            return {
+                'queue_depth': depth,
+                'waiting_sessions': sum(len(lane) for lane in self._lanes.values()),
+                'granted': self.granted,
+                'backoffs': self.backoffs,
+                'wait_avg_seconds': round(sum(waits) / len(waits), 3) if waits else 0.0,
+                'wait_p95_seconds': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                'wait_max_seconds': round(waits[-1], 3) if waits else 0.0,
+                'calls_per_minute': round(self.bucket.rate * 60, 1),
+            }
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        limits: Dict[str, float],
+        burst: int = 5,
+        session_quota_per_hour: int = 0,
+        acquire_timeout: Optional[float] = 300
+    ):
+        self.limits = limits
+        self.burst = burst
+        self.session_quota_per_hour = session_quota_per_hour
+        self.acquire_timeout = acquire_timeout
+        self.quota_rejections = 0
+        self.single_flight = SingleFlight()
+        self._providers: Dict[str, ProviderQueue] = {}
+        self._usage: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def _provider(self, name: str) -> ProviderQueue:
+        with self._lock:
+            if name not in self._providers:
+                self._providers[name] = ProviderQueue(name, self.limits.get(name, 60), self.burst)
+            return self._providers[name]
+
+    def _charge_quota(self, session_id: Optional[str]) -> None:
+        if not session_id or not self.session_quota_per_hour:
+            return
+        now = time.monotonic()
+        with self._lock:
+            usage = self._usage.setdefault(session_id, deque())
+            while usage and now - usage[0] > 3600:
+                usage.popleft()
+            if len(usage) >= self.session_quota_per_hour:
+                self.quota_rejections += 1
+                raise QuotaExceeded(f"Session has used its {self.session_quota_per_hour} calls for this hour")
+            usage.append(now)
+
+    def call(self, provider: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn` once the provider has capacity, backing off and retrying when it reports a rate limit."""
+        session_id = _session_id.get()
+        priority = _priority.get()
+        self._charge_quota(session_id)
+        queue = self._provider(provider)
+
+        for attempt in range(3):
+            queue.acquire(session_id or "anonymous", priority, self.acquire_timeout)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == 2 or not _is_rate_limit_error(e):
+                    raise
+                print(f"Warning: {provider} rate limited the call, backing off. Error: {e}")
+                queue.backoff(2 ** (attempt + 1))
+
+    def call_coalesced(self, key: Any, provider: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Like `call`, but shares the result with identical calls (same `key`) already in flight.
+
+        Only calls of the same priority class are coalesced, so an interactive
+        call never ends up waiting behind a batch job's slot.
+        """
+        return self.single_flight.do(
+            (provider, _priority.get(), key), lambda: self.call(provider, fn, *args, **kwargs), timeout=self.acquire_timeout
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = dict(self._providers)
+        return {
+            'providers': {name: queue.metrics() for name, queue in providers.items()},
+            'quota_rejections': self.quota_rejections,
+            'coalescing': dict(self.single_flight.stats, in_flight=self.single_flight.in_flight()),
+        }
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller (the leader) runs the call and the others wait for its
+    outcome. A waiter that gives up, because its timeout expires, only stops
+    its own wait. If the leader fails for a reason tied to that caller (its
+    session quota, its scheduler wait, or being interrupted), the waiters do
+    not inherit the failure and retry instead, so one of them becomes the new
+    leader.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Any, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'coalesced': 0, 'waiter_timeouts': 0, 'retried': 0}
+
+    def do(self, key: Any, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    self.stats['leaders'] += 1
+                    leader = True
+                else:
+                    flight.waiters += 1
+                    self.stats['coalesced'] += 1
+                    leader = False
+
+            if leader:
+                return self._lead(key, flight, fn)
+
+            if not flight.done.wait(timeout):
+                with self._lock:
+                    flight.waiters -= 1
+                    self.stats['waiter_timeouts'] += 1
+                raise SchedulerTimeout(f"Waited more than {timeout}s for an identical call in flight")
+            if flight.error is None:
+                return flight.result
+            if not _is_caller_specific(flight.error):
+                raise flight.error
+            with self._lock:
+                self.stats['retried'] += 1
+
+    def _lead(self, key: Any, flight: _Flight, fn: Callable[[], Any]) -> Any:
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+def _is_caller_specific(error: BaseException) -> bool:
+    """Failures that belong to the leader's request rather than to the call itself."""
+    return isinstance(error, (QuotaExceeded, SchedulerTimeout)) or not isinstance(error, Exception)
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("429", "resourceexhausted", "resource exhausted", "rate limit", "quota"))
+
+
+scheduler = RequestScheduler(
+    limits={
+        'gemini': float(os.getenv("GEMINI_CALLS_PER_MINUTE", 60)),
+        'serper': float(os.getenv("SERPER_CALLS_PER_MINUTE", 60)),
+        'youtube': float(os.getenv("YOUTUBE_CALLS_PER_MINUTE", 60)),
+    },
+    burst=int(os.getenv("SCHEDULER_BURST", 5)),
+    session_quota_per_hour=int(os.getenv("SESSION_CALLS_PER_HOUR", 300))
+)
+
+
+class ScheduledClient:
+    """Proxy that sends selected client methods through the scheduler.
+
+    `settings` identifies the client configuration (e.g. model and
+    temperature); together with the method and arguments it decides which
+    in-flight calls are identical and can be coalesced.
+    """
+
+    def __init__(self, client: Any, provider: str, methods: tuple, settings: tuple = ()):
+        self._client = client
+        self._provider_name = provider
+        self._methods = methods
+        self._settings = settings
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name in self._methods:
+            def scheduled(*args, **kwargs):
+                key = repr((self._settings, name, args, sorted(kwargs.items())))
+                return scheduler.call_coalesced(key, self._provider_name, attr, *args, **kwargs)
+            return scheduled
+        return attr
@@ -0,0 +1,199 @@
+"""Shared, bounded storage for the large per-session artifacts of the app.
+
+Resume text, job results, analyses, letters and video lists are stored once
+in a process-wide content-addressed store, compressed, with a reference count
+per blob. A session only keeps the names and hashes of its artifacts, so
+sessions that upload the same sample resume or get the same results share
+one copy.
+
+Two memory budgets bound the process. When one session goes over its own
+budget, its least recently used artifacts are evicted. When the store as a
+whole goes over the global budget, whole sessions are evicted, least
+recently active first. An evicted artifact simply reads as missing, so the
+page offers to generate it again.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+
+def _encode(value: Any) -> Tuple[str, bytes, int]:
+    """Canonical (digest, compressed JSON, uncompressed size) form of a value."""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), zlib.compress(raw, 6), len(raw)
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class _Blob:
+    __slots__ = ('data', 'refs', 'raw_bytes')
+
+    def __init__(self, data: bytes, raw_bytes: int):
+        self.data = data
+        self.refs = 0
+        self.raw_bytes = raw_bytes
+
+
+class _Session:
+    def __init__(self):
+        # artifact name -> blob digest, in least recently used first order
+        self.artifacts: "OrderedDict[str, str]" = OrderedDict()
+        self.last_active = time.time()
+        self.evicted_artifacts = 0
+
+
+class SessionStore:
+    def __init__(self, session_budget_bytes: int, global_budget_bytes: int):
+        self.session_budget_bytes = session_budget_bytes
+        self.global_budget_bytes = global_budget_bytes
+        self._blobs: Dict[str, _Blob] = {}
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'artifact_evictions': 0, 'session_evictions': 0, 'deduplicated_puts': 0}
+
+    def put(self, session_id: str, name: str, value: Any) -> str:
+        """Store `value` as the session's artifact `name`; returns its content hash.
+
+        `value` must be JSON-serializable; anything else raises TypeError.
+        """
+        digest, data, raw_bytes = _encode(value)
+        with self._lock:
+            session = self._touch(session_id)
+            blob = self._blobs.get(digest)
+            if blob is None:
+                blob = self._blobs[digest] = _Blob(data, raw_bytes)
+            elif session.artifacts.get(name) != digest:
+                self.stats['deduplicated_puts'] += 1
+
+            previous = session.artifacts.get(name)
+            if previous != digest:
+                blob.refs += 1
+                if previous:
+                    self._unref(previous)
+            session.artifacts[name] = digest
+            session.artifacts.move_to_end(name)
+
+            self._enforce_session_budget(session, keep=name)
+            self._enforce_global_budget(keep=session_id)
+            return digest
+
+    def get(self, session_id: str, name: str, default: Any = None) -> Any:
+        """A fresh copy of the artifact, or `default` if it was never stored or has been evicted."""
+        with self._lock:
+            session = self._touch(session_id)
+            digest = session.artifacts.get(name)
+            if digest is None:
+                return default
+            session.artifacts.move_to_end(name)
+            data = self._blobs[digest].data
+        return _decode(data)
+
+    def contains(self, session_id: str, name: str) -> bool:
+        """Whether the artifact is stored, without decoding it."""
+        with self._lock:
+            return name in self._touch(session_id).artifacts
+
+    def items(self, session_id: str, prefix: str) -> Dict[str, Any]:
+        """All artifacts of a session whose name starts with `prefix`, keyed by the rest of the name."""
+        with self._lock:
+            session = self._touch(session_id)
+            found = {name: self._blobs[digest].data for name, digest in session.artifacts.items() if name.startswith(prefix)}
+        return {name[len(prefix):]: _decode(data) for name, data in found.items()}
+
+    def delete(self, session_id: str, name: str) -> None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session and name in session.artifacts:
+                self._unref(session.artifacts.pop(name))
+
+    def drop_session(self, session_id: str) -> None:
+        with self._lock:
+            self._evict_session(session_id)
+
+    def profile(self) -> Dict[str, Any]:
+        """Memory use of the store, overall and per session, for profiling panels."""
+        with self._lock:
+            sessions = {}
+            for session_id, session in self._sessions.items():
+                blobs = [self._blobs[digest] for digest in session.artifacts.values()]
+                sessions[session_id] = {
+                    'artifacts': {name: len(self._blobs[digest].data) for name, digest in session.artifacts.items()},
+                    'bytes': sum(len(blob.data) for blob in blobs),
+                    'shared_bytes': sum(len(blob.data) for blob in blobs if blob.refs > 1),
+                    'idle_seconds': round(time.time() - session.last_active, 1),
+                    'evicted_artifacts': session.evicted_artifacts,
+                }
+            referenced = sum(info['bytes'] for info in sessions.values())
+            return {
+                'sessions': sessions,
+                'blobs': len(self._blobs),
+                'stored_bytes': self._stored_bytes(),
+                'uncompressed_bytes': sum(blob.raw_bytes for blob in self._blobs.values()),
+                'referenced_bytes': referenced,
+                'session_budget_bytes': self.session_budget_bytes,
+                'global_budget_bytes': self.global_budget_bytes,
+                **self.stats,
+            }
+
+    def _touch(self, session_id: str) -> _Session:
+        """Caller holds the lock."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session()
+        session.last_active = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _unref(self, digest: str) -> None:
+        blob = self._blobs[digest]
+        blob.refs -= 1
+        if blob.refs <= 0:
+            del self._blobs[digest]
+
+    def _stored_bytes(self) -> int:
+        return sum(len(blob.data) for blob in self._blobs.values())
+
+    def _session_bytes(self, session: _Session) -> int:
+        return sum(len(self._blobs[digest].data) for digest in session.artifacts.values())
+
+    def _enforce_session_budget(self, session: _Session, keep: str) -> None:
+        if not self.session_budget_bytes:
+            return
+        for name in list(session.artifacts):
+            if self._session_bytes(session) <= self.session_budget_bytes:
+                break
+            if name == keep:
+                continue
+            self._unref(session.artifacts.pop(name))
+            session.evicted_artifacts += 1
+            self.stats['artifact_evictions'] += 1
+
+    def _enforce_global_budget(self, keep: str) -> None:
+        if not self.global_budget_bytes:
+            return
+        # Sessions are ordered least recently active first
+        for session_id in list(self._sessions):
+            if self._stored_bytes() <= self.global_budget_bytes:
+                break
+            if session_id != keep:
+                self._evict_session(session_id)
+                self.stats['session_evictions'] += 1
+
+    def _evict_session(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session:
+            for digest in session.artifacts.values():
+                self._unref(digest)
+
+
+session_store = SessionStore(
+    session_budget_bytes=int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", 8)) * 1024 * 1024),
+    global_budget_bytes=int(float(os.getenv("GLOBAL_MEMORY_BUDGET_MB", 256)) * 1024 * 1024)
+)
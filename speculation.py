@@ -0,0 +1,153 @@
+"""Opt-in speculative precomputation of cheap, resume-only results.
+
+Right after a resume is uploaded, work that every later page action starts
+with (job profile extraction, learning keywords, local metrics) is kicked
+off in the background at low scheduler priority. Results are stored per
+resume hash, so a later button click can pick them up instead of making
+the call from cold. Each upload may spend at most `max_calls` LLM calls,
+and speculation for a resume is cancelled once no session is using it.
+"""
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from scheduler import request_context, BACKGROUND
+
+
+def _job_profiles(resume_content: str) -> List[str]:
+    from job_search import JobSearchEngine
+    return JobSearchEngine().extract_job_profiles(resume_content)
+
+
+def _learning_keywords(resume_content: str) -> List[str]:
+    from youtube_recommender import YouTubeRecommender
+    # Not generate_keywords: its generic fallback would be cached for the resume
+    return YouTubeRecommender().extract_keywords(resume_content)
+
+
+def _local_metrics(resume_content: str) -> Dict[str, Any]:
+    from resume_analyzer import compute_local_metrics
+    return compute_local_metrics(resume_content)
+
+
+# (name, LLM calls it costs, function), in the order budget is spent
+SPECULATIVE_JOBS: List[Tuple[str, int, Callable[[str], Any]]] = [
+    ('local_metrics', 0, _local_metrics),
+    ('job_profiles', 1, _job_profiles),
+    ('learning_keywords', 1, _learning_keywords),
+]
+
+
+class Speculation:
+    def __init__(self, digest: str):
+        self.digest = digest
+        self.futures: Dict[str, Future] = {}
+        self.owners: Set[str] = set()
+        self.calls_used = 0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        for future in self.futures.values():
+            future.cancel()
+
+
+class Speculator:
+    def __init__(self, max_calls: int = 2, max_workers: int = 2, max_entries: int = 64):
+        self.max_calls = max_calls
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self._specs: "OrderedDict[str, Speculation]" = OrderedDict()
+        self._by_session: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'cancelled': 0, 'used': 0}
+
+    def start(self, session_id: str, digest: str, resume_content: str) -> Speculation:
+        """Speculate for a session's current resume; idempotent, and cancels the session's previous resume."""
+        with self._lock:
+            previous = self._by_session.get(session_id)
+            if previous and previous != digest:
+                self._release(session_id, previous)
+            self._by_session[session_id] = digest
+
+            spec = self._specs.get(digest)
+            if spec and not spec.cancelled:
+                spec.owners.add(session_id)
+                self._specs.move_to_end(digest)
+                return spec
+
+            spec = Speculation(digest)
+            spec.owners.add(session_id)
+            self._specs[digest] = spec
+            while len(self._specs) > self.max_entries:
+                _, evicted = self._specs.popitem(last=False)
+                evicted.cancel()
+
+            with request_context(session_id=session_id, priority=BACKGROUND):
+                for name, cost, fn in SPECULATIVE_JOBS:
+                    if spec.calls_used + cost > self.max_calls:
+                        continue
+                    spec.calls_used += cost
+                    spec.futures[name] = self._executor.submit(
+                        contextvars.copy_context().run, self._run, spec, fn, resume_content
+                    )
+            self.stats['started'] += 1
+            return spec
+
+    def active(self, session_id: str, digest: str) -> bool:
+        """Whether the session is already speculating for this resume, so `start` can be skipped."""
+        with self._lock:
+            spec = self._specs.get(digest)
+            return self._by_session.get(session_id) == digest and spec is not None and not spec.cancelled
+
+    def stop(self, session_id: str) -> None:
+        """Cancel speculation for a session that turned the feature off or removed its resume."""
+        with self._lock:
+            digest = self._by_session.pop(session_id, None)
+            if digest:
+                self._release(session_id, digest)
+
+    def result(self, digest: Optional[str], name: str, wait: bool = True) -> Optional[Any]:
+        """Speculated result for a resume, or None if it was never started, failed or was cancelled.
+
+        With `wait`, a speculation that is already running is awaited rather
+        than duplicated. One still queued behind other sessions' speculation
+        is cancelled instead, so the caller makes the call itself at its own
+        priority rather than waiting on background work.
+        """
+        with self._lock:
+            spec = self._specs.get(digest)
+            future = spec.futures.get(name) if spec else None
+        if future is None:
+            return None
+        if not future.done() and (not wait or future.cancel()):
+            return None
+        try:
+            value = future.result()
+        except (CancelledError, Exception):
+            return None
+        if value is not None:
+            self.stats['used'] += 1
+        return value
+
+    def _release(self, session_id: str, digest: str) -> None:
+        """Caller holds the lock."""
+        spec = self._specs.get(digest)
+        if spec is None:
+            return
+        spec.owners.discard(session_id)
+        if not spec.owners:
+            spec.cancel()
+            del self._specs[digest]
+            self.stats['cancelled'] += 1
+
+    @staticmethod
+    def _run(spec: Speculation, fn: Callable[[str], Any], resume_content: str) -> Any:
+        if spec.cancelled:
+            return None
+        return fn(resume_content)
+
+
+speculator = Speculator(max_calls=int(os.getenv("SPECULATION_MAX_CALLS", 2)))
@@ -0,0 +1,141 @@
+"""Offline stand-ins for Gemini, Serper and YouTube search.
+
+Selected with LLM_BACKEND=stub. Responses are shaped like the real ones so
+every engine runs end to end without API keys; STUB_LATENCY_SECONDS adds a
+fixed delay per call to mimic network time.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+
+
+def _latency():
+    return float(os.getenv("STUB_LATENCY_SECONDS", "0.05"))
+
+
+def _field(prompt, label, default):
+    match = re.search(rf"- {label}:\s*(.+)", prompt)
+    return match.group(1).strip() if match else default
+
+
+class StubMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubLLM:
+    def __init__(self, model="stub", temperature=0.0, latency=None, **kwargs):
+        self.model = model
+        self.temperature = temperature
+        self.latency = _latency() if latency is None else latency
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        return StubMessage(self._respond(prompt))
+
+    def _respond(self, prompt):
+        if "extract 5-7 specific job titles" in prompt:
+            return "Software Engineer\nBackend Developer\nFull Stack Developer\nData Engineer\nPlatform Engineer"
+
+        if "Raw Search Results" in prompt:
+            titles = re.findall(r'"title": "([^"]+)"', prompt)
+            links = re.findall(r'"link": "([^"]+)"', prompt)
+            limit = int(re.search(r"extract up to (\d+)", prompt).group(1)) if "extract up to" in prompt else 10
+            jobs = [
+                {
+                    "title": title.split(" - ")[0],
+                    "company": title.split(" - ")[-1],
+                    "location": "Remote",
+                    "link": link,
+                    "relevance_reason": "Matches the candidate's core skills."
+                }
+                for title, link in list(zip(titles, links))[:limit]
+            ]
+            return json.dumps({"jobs": jobs})
+
+        if "ATS Compatibility Score" in prompt:
+            return json.dumps({
+                "ats_score": 78,
+                "score_breakdown": {"formatting_score": 20, "keyword_optimization": 18, "content_quality": 20, "ats_compatibility": 20},
+                "strengths": ["Clear structure", "Relevant experience", "Strong technical skills"],
+                "critical_improvements": ["Quantify achievements", "Add a summary", "Tailor keywords"],
+                "missing_keywords": ["kubernetes", "ci/cd", "system design", "mentoring", "observability"],
+                "keyword_count": 24,
+                "section_count": 5,
+                "formatting_issues": [],
+                "achievement_analysis": {"quantified_achievements": 3, "action_verbs_used": 12, "impact_statements": 4},
+                "industry_alignment": "Well aligned with software engineering roles.",
+                "overall_assessment": "A solid resume that would benefit from more measurable results.",
+                "top_3_priorities": ["Quantify impact", "Add summary", "Expand keywords"],
+                "ats_red_flags": []
+            })
+
+        if "immediate_actions" in prompt:
+            return json.dumps({
+                "immediate_actions": ["Add metrics to each role", "Lead with a summary", "Use strong action verbs"],
+                "content_improvements": ["Focus on outcomes", "Trim older roles"],
+                "keyword_strategy": ["Mirror job posting language", "Group skills by category"],
+                "formatting_fixes": ["Use a single column", "Standardize dates"],
+                "achievement_examples": ["Cut API latency 40% by adding caching", "Led a team of 5 to ship v2 on time"]
+            })
+
+        if "candidate narrative" in prompt:
+            return (
+                "Name and Contact: Jane Doe, jane@example.com\n"
+                "Summary: Software engineer with 5 years of experience building web services.\n"
+                "Key Achievements:\n- Cut API latency 40%\n- Led a team of 5\n"
+                "Themes: reliability, mentoring, product focus\n"
+                "Core Skills: Python, React, SQL"
+            )
+
+        if "cover letter" in prompt:
+            position = _field(prompt, "Position", "the role")
+            company = _field(prompt, "Company", "your company")
+            greeting = _field(prompt, "Greeting", "Dear Hiring Manager,")
+            return (
+                f"{_field(prompt, 'Date', '')}\n\n{greeting}\n\n"
+                f"I am excited to apply for the {position} position at {company}. "
+                "My experience building reliable services maps directly to this role.\n\n"
+                "Sincerely,\nJane Doe"
+            )
+
+        if "keywords for searching educational content" in prompt:
+            return "python, react, system design, sql, interview preparation"
+
+        return "OK"
+
+
+class StubSearch:
+    def __init__(self, latency=None):
+        self.latency = _latency() if latency is None else latency
+
+    def results(self, query, num_results=5, **kwargs):
+        time.sleep(self.latency)
+        profile = query.split('"')[1] if '"' in query else query
+        # The first two postings per profile come back for every location, like aggregator listings
+        slugs = [hashlib.md5((profile if i < 2 else query).encode("utf-8")).hexdigest()[:8] for i in range(num_results)]
+        return {
+            "organic": [
+                {
+                    "title": f"{profile} - Example Corp {i}",
+                    "link": f"https://jobs.example.com/{slug}/{i}",
+                    "snippet": f"Hiring a {profile}. {query}"
+                }
+                for i, slug in enumerate(slugs)
+            ]
+        }
+
+
+class StubYouTubeTool:
+    def __init__(self, latency=None):
+        self.latency = _latency() if latency is None else latency
+
+    def run(self, query):
+        time.sleep(self.latency)
+        digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+        ids = [digest[i:i + 11] for i in (0, 11, 22)]
+        return str([f"https://www.youtube.com/watch?v={video_id}" for video_id in ids])
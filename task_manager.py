@@ -0,0 +1,117 @@
+import contextvars
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Task:
+    def __init__(self, session_id: str, task_id: str, label: str, meta: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.task_id = task_id
+        self.label = label
+        self.meta = meta or {}
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def report_progress(self, fraction: float, message: str = "") -> None:
+        """Called from the worker thread to publish progress to polling pages."""
+        self.progress = max(0.0, min(1.0, fraction))
+        self.message = message
+
+
+class TaskManager:
+    def __init__(self, max_workers: int = 8, finished_ttl_seconds: float = 3600):
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background-task")
+        self._tasks: Dict[Tuple[str, str], Task] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        session_id: str,
+        task_id: str,
+        fn: Callable[..., Any],
+        *args,
+        label: str = "",
+        meta: Optional[Dict[str, Any]] = None,
+        with_progress: bool = False,
+        **kwargs
+    ) -> Task:
+        """Run `fn` in the background under (session_id, task_id).
+
+        Submitting an ID that is still pending or running returns the existing
+        task instead of starting a duplicate. With `with_progress`, `fn`
+        receives a `progress(fraction, message)` keyword argument. The task
+        runs in a copy of the caller's context, so scheduler attribution
+        (session and priority) carries over.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._tasks.get((session_id, task_id))
+            if existing and not existing.finished:
+                return existing
+
+            task = Task(session_id, task_id, label or task_id, meta)
+            self._tasks[(session_id, task_id)] = task
+
+        if with_progress:
+            kwargs['progress'] = task.report_progress
+        task.future = self._executor.submit(contextvars.copy_context().run, self._run, task, fn, args, kwargs)
+        return task
+
+    def get(self, session_id: str, task_id: str) -> Optional[Task]:
+        with self._lock:
+            return self._tasks.get((session_id, task_id))
+
+    def tasks_for(self, session_id: str) -> List[Task]:
+        with self._lock:
+            return [task for (owner, _), task in self._tasks.items() if owner == session_id]
+
+    def pop_finished(self, session_id: str, task_id: str) -> Optional[Task]:
+        """Remove and return a task once it has finished, so its result is consumed exactly once."""
+        with self._lock:
+            task = self._tasks.get((session_id, task_id))
+            if task and task.finished:
+                return self._tasks.pop((session_id, task_id))
+            return None
+
+    def _run(self, task: Task, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        task.status = RUNNING
+        try:
+            task.result = fn(*args, **kwargs)
+            task.progress = 1.0
+            task.status = DONE
+        except Exception as e:
+            print(f"Error in background task '{task.label}': {e}\n{traceback.format_exc()}")
+            task.error = str(e)
+            task.status = FAILED
+        finally:
+            task.finished_at = time.time()
+
+    def _prune(self) -> None:
+        """Drop finished tasks nobody collected, e.g. from closed sessions. Caller holds the lock."""
+        cutoff = time.time() - self.finished_ttl_seconds
+        for key in [key for key, task in self._tasks.items() if task.finished and task.finished_at < cutoff]:
+            del self._tasks[key]
+
+
+# Process-wide, so work outlives the Streamlit script run that started it
+task_manager = TaskManager(max_workers=int(os.getenv("BACKGROUND_TASK_WORKERS", 8)))
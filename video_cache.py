@@ -0,0 +1,190 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from scheduler import BACKGROUND, request_context
+
+# Spellings that should share one cache entry
+KEYWORD_SYNONYMS = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "k8s": "kubernetes",
+    "aws": "amazon web services",
+    "gcp": "google cloud",
+    "reactjs": "react",
+    "react js": "react",
+    "nodejs": "node",
+    "node js": "node",
+    "vuejs": "vue",
+    "postgres": "postgresql",
+    "sql server": "mssql",
+    "ci cd": "cicd",
+    "interview prep": "interview preparation",
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+_SINGULAR_EXCEPTIONS = ("ss", "us", "is", "ics", "ness")
+
+
+def _singularize(token: str) -> str:
+    if len(token) <= 3 or token.endswith(_SINGULAR_EXCEPTIONS):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Map a learning keyword to its cache key (case, punctuation, plurals and synonyms)."""
+    text = _NON_WORD.sub(" ", keyword.lower().replace(".", "")).strip()
+    text = KEYWORD_SYNONYMS.get(text, text)
+    tokens = [KEYWORD_SYNONYMS.get(token, token) for token in text.split()]
+    return " ".join(_singularize(token) for token in " ".join(tokens).split())
+
+
+class VideoCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 500,
+        refresh_ahead: float = 0.8,
+        background_refresh: bool = True
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh_ahead = refresh_ahead
+        self.background_refresh = background_refresh
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="video-cache-refresh")
+        self._load()
+
+    def get(self, keyword: str) -> Optional[Any]:
+        """Return cached videos for a keyword, or None when missing or expired."""
+        key = normalize_keyword(keyword)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._age(entry) > self.ttl_seconds:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry['videos']
+
+    def set(self, keyword: str, videos: Any) -> None:
+        key = normalize_keyword(keyword)
+        with self._lock:
+            self._entries[key] = {'videos': videos, 'fetched_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._save()
+
+    def get_or_fetch(self, keyword: str, fetch: Callable[[], Any]) -> Any:
+        """Serve a keyword from cache, fetching on a miss and refreshing near-expiry entries in the background."""
+        videos = self.get(keyword)
+        if videos is None:
+            videos = fetch()
+            if videos:
+                self.set(keyword, videos)
+            return videos
+
+        if self.background_refresh and self._near_expiry(keyword):
+            self._schedule_refresh(keyword, fetch)
+        return videos
+
+    def _near_expiry(self, keyword: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(normalize_keyword(keyword))
+            return entry is not None and self._age(entry) > self.ttl_seconds * self.refresh_ahead
+
+    def _schedule_refresh(self, keyword: str, fetch: Callable[[], Any]) -> None:
+        key = normalize_keyword(keyword)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                # Keeps the caller's session, but must not compete with interactive calls
+                with request_context(priority=BACKGROUND):
+                    videos = fetch()
+                if videos:
+                    self.set(keyword, videos)
+                    self.stats['refreshes'] += 1
+            except Exception as e:
+                print(f"Warning: Background refresh for '{keyword}' failed. Error: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_pool.submit(contextvars.copy_context().run, refresh)
+
+    @staticmethod
+    def _age(entry: Dict[str, Any]) -> float:
+        return time.time() - entry['fetched_at']
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not load video cache from {self.path}. Error: {e}")
+            return
+
+        # Oldest first, so LRU order survives the round trip
+        for key, entry in sorted(stored.items(), key=lambda item: item[1].get('fetched_at', 0)):
+            if self._age(entry) <= self.ttl_seconds:
+                self._entries[key] = entry
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError) as e:
+            print(f"Warning: Could not persist video cache to {self.path}. Error: {e}")
+
+
+_shared_cache: Optional[VideoCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_video_cache() -> VideoCache:
+    """Process-wide cache shared by every session."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = VideoCache(
+                path=os.getenv("VIDEO_CACHE_PATH", os.path.join(".cache", "video_cache.json")),
+                ttl_seconds=float(os.getenv("VIDEO_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+                max_entries=int(os.getenv("VIDEO_CACHE_MAX_ENTRIES", 500))
+            )
+        return _shared_cache
@@ -1,22 +1,115 @@
-import os
-from langchain_community.tools import YouTubeSearchTool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from dotenv import load_dotenv
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass, asdict
+from llm_backend import get_youtube_tool
+from model_router import RoutedLLM
+from video_cache import get_video_cache
 
-load_dotenv()
+# Compiled once; tried in order, first pattern with matches wins
+_TITLED_LINK_PATTERNS = [
+    re.compile(r'\[(.*?)\]\((.*?)\)', re.MULTILINE | re.DOTALL),  # Markdown links: [title](url)
+    re.compile(r'Title:\s*(.*?)\s*URL:\s*(.*?)(?:\n|$)', re.MULTILINE | re.DOTALL),  # Title: ... URL: ...
+    re.compile(r'(.*?)\s*-\s*(https?://[^\s\'",\]]+)', re.MULTILINE),  # Title - URL
+]
+_URL_PATTERN = re.compile(r'https?://[^\s\'",\]]+')
+_VIDEO_ID_PATTERN = re.compile(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/)|youtu\.be/)([A-Za-z0-9_-]{11})')
+_BULLET_PATTERN = re.compile(r'^[-•*]\s*')
 
-class YouTubeRecommender:
-    def __init__(self):
-        # Use LangChain's wrapper for Gemini
-        self.model = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            temperature=0.2,
-            google_api_key=os.getenv('GOOGLE_API_KEY')
+
+@dataclass(frozen=True, slots=True)
+class VideoRecord:
+    video_id: str
+    title: str
+    url: str
+    thumbnail_url: str
+
+    @classmethod
+    def from_link(cls, title, url):
+        """Build a record from a title and YouTube URL, or return None if the URL has no video ID"""
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        
+        match = _VIDEO_ID_PATTERN.search(url)
+        if not match:
+            return None
+        
+        video_id = match.group(1)
+        return cls(
+            video_id=video_id,
+            title=title.strip() or "Untitled Video",
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            thumbnail_url=f"https://img.youtube.com/vi/{video_id}/hqdefault.jpg"
         )
-        self.youtube_tool = YouTubeSearchTool()
+
+
+def parse_video_records(raw):
+    """Parse YouTubeSearchTool output (or cached data) into VideoRecords, deduplicated by video ID"""
+    if not raw:
+        return []
+    
+    links = []
+    if isinstance(raw, str):
+        for pattern in _TITLED_LINK_PATTERNS:
+            links = pattern.findall(raw)
+            if links:
+                break
+        
+        if not links:
+            # Bare URLs (the tool's default output is a list of URLs); use surrounding text as the title
+            for line in raw.splitlines():
+                for url in _URL_PATTERN.findall(line):
+                    title = _BULLET_PATTERN.sub('', _URL_PATTERN.sub('', line).strip(" []'\",")).strip()
+                    links.append((title, url))
+    else:
+        for video in raw:
+            if isinstance(video, VideoRecord):
+                links.append((video.title, video.url))
+            elif isinstance(video, dict):
+                links.append((video.get('title', video.get('name', '')), video.get('url', video.get('link', ''))))
+            elif isinstance(video, (tuple, list)) and len(video) >= 2:
+                links.append((video[0], video[1]))
+            elif isinstance(video, str):
+                match = _URL_PATTERN.search(video)
+                if match:
+                    links.append((_BULLET_PATTERN.sub('', _URL_PATTERN.sub('', video).strip()), match.group()))
+    
+    records = []
+    seen = set()
+    for title, url in links:
+        record = VideoRecord.from_link(title, url)
+        if record and record.video_id not in seen:
+            seen.add(record.video_id)
+            records.append(record)
+    
+    # Number untitled videos in display order
+    return [
+        record if record.title != "Untitled Video" else VideoRecord(record.video_id, f"Video {i}", record.url, record.thumbnail_url)
+        for i, record in enumerate(records, 1)
+    ]
+
+
+class YouTubeRecommender:
+    def __init__(self, max_keywords=5, max_workers=5, keyword_timeout=15.0, video_cache=None, model=None, youtube_tool=None):
+        self.model = model or RoutedLLM(temperature=0.2)
+        self.youtube_tool = youtube_tool or get_youtube_tool()
+        self.max_keywords = max_keywords
+        self.max_workers = max_workers
+        self.keyword_timeout = keyword_timeout
+        self.video_cache = video_cache or get_video_cache()
     
     def generate_keywords(self, resume_content):
-        """Generate 5-7 keywords for YouTube search based on resume"""
+        """Generate 5-7 keywords for YouTube search based on resume, falling back to generic ones on failure"""
+        try:
+            return self.extract_keywords(resume_content)
+        except Exception as e:
+            print(f"Keyword generation failed: {e}")
+            return ["career development", "professional skills", "interview preparation", "resume tips", "workplace communication"]
+    
+    def extract_keywords(self, resume_content):
+        """Generate 5-7 keywords for YouTube search based on resume; model errors propagate"""
         prompt = f"""
         Based on this resume, generate 5-7 keywords for searching educational content on YouTube.
         Focus on skills, technologies, career development, and learning opportunities.
@@ -26,37 +119,81 @@ class YouTubeRecommender:
         
         Keywords:
         """
+        response = self.model.invoke(prompt, task='learning_keywords')
+        keywords = response.content.strip().split(',')
+        return [kw.strip() for kw in keywords if kw.strip()]
+    
+    def search_videos(self, keywords, max_keywords=None, concurrent=True):
+        """Search YouTube for videos based on keywords, keeping keyword order"""
+        keywords = keywords[:max_keywords or self.max_keywords]
+        if not keywords:
+            return []
+        
+        if not concurrent:
+            return self._dedupe_across_keywords([item for item in map(self._search_keyword, keywords) if item])
+        
+        workers = max(1, min(self.max_workers, len(keywords)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="youtube-search")
+        started = time.monotonic()
+        futures = [executor.submit(contextvars.copy_context().run, self._search_keyword, keyword) for keyword in keywords]
+        
+        results = []
         try:
-            response = self.model.invoke(prompt)
-            keywords = response.content.strip().split(',')
-            return [kw.strip() for kw in keywords if kw.strip()]
+            for i, (keyword, future) in enumerate(zip(keywords, futures)):
+                # Keywords beyond the first wave of workers start later, so they get later deadlines
+                deadline = started + self.keyword_timeout * (i // workers + 1)
+                try:
+                    item = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except TimeoutError:
+                    print(f"Search for {keyword} timed out after {self.keyword_timeout}s")
+                    continue
+                
+                if item:
+                    results.append(item)
+        finally:
+            # Do not wait on a hung scrape; its result is simply dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return self._dedupe_across_keywords(results)
+    
+    def _search_keyword(self, keyword):
+        """Run a single YouTube search, returning None on failure"""
+        try:
+            search_query = f"{keyword} tutorial course"
+            # The cache stores plain dicts so it stays JSON-serializable
+            cached = self.video_cache.get_or_fetch(
+                keyword,
+                lambda: [asdict(record) for record in parse_video_records(self.youtube_tool.run(search_query))]
+            )
+            videos = parse_video_records(cached)
+            
+            if videos:
+                return {
+                    'keyword': keyword,
+                    'videos': videos
+                }
         except Exception as e:
-            print(f"Keyword generation failed: {e}")
-            return ["career development", "professional skills", "interview preparation", "resume tips", "workplace communication"]
+            print(f"Error searching for {keyword}: {e}")
+        
+        return None
     
-    def search_videos(self, keywords):
-        """Search YouTube for videos based on keywords"""
+    @staticmethod
+    def _dedupe_across_keywords(results):
+        """Keep each video only under the first keyword that found it"""
+        seen = set()
         recommendations = []
         
-        for keyword in keywords[:5]:  # Limit to 5 searches
-            try:
-                search_query = f"{keyword} tutorial course"
-                results = self.youtube_tool.run(search_query)
-                
-                if results:
-                    recommendations.append({
-                        'keyword': keyword,
-                        'videos': results
-                    })
-            except Exception as e:
-                print(f"Error searching for {keyword}: {e}")
-                continue
+        for item in results:
+            videos = [video for video in item['videos'] if video.video_id not in seen]
+            seen.update(video.video_id for video in videos)
+            if videos:
+                recommendations.append({'keyword': item['keyword'], 'videos': videos})
         
         return recommendations
     
-    def get_recommendations(self, resume_content):
-        """Get YouTube course recommendations based on resume"""
-        keywords = self.generate_keywords(resume_content)
+    def get_recommendations(self, resume_content, keywords=None):
+        """Get YouTube course recommendations based on resume, optionally with precomputed keywords"""
+        keywords = keywords or self.generate_keywords(resume_content)
         recommendations = self.search_videos(keywords)
         
         return {